@@ -1,6 +1,6 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { io } from "socket.io-client";
 import Pagination from "./pagination";
 import ReviewsTable, { Review } from "./reviews-table";
@@ -14,24 +14,33 @@ export default function Reviews({ url }: { url: string }) {
   const [range, setRange] = useState(RECORD_PER_LOAD);
   const [page, setPage] = useState(1);
   const [isPending, setIsPending] = useState(true);
+  // Keyset cursor of the next page, sent back by the server after each page
+  const cursor = useRef<string | null>(null);
+
+  // A new movie starts from its first page; runs before the fetch below
+  useEffect(() => {
+    cursor.current = null;
+    setReviews([]);
+    setPage(1);
+  }, [url]);
 
   useEffect(() => {
     setIsPending(true);
     const socket = io(process.env.NEXT_PUBLIC_SERVER_URL);
-    socket.emit("ask_reviews", { url, range: [range - RECORD_PER_LOAD, range] });
+    socket.emit("ask_reviews", { url, cursor: cursor.current, limit: RECORD_PER_LOAD });
     socket.on("review", (data) => setReviews((reviews) => [...reviews, data]));
+    socket.on("page_end", (data) => {
+      // Also sent when the page failed: "Load more" retries from the returned cursor
+      if (data.error) console.error("Loading reviews failed:", data.error);
+      cursor.current = data.cursor;
+      setIsPending(false);
+    });
 
     return () => {
       socket.disconnect();
     };
   }, [url, range]);
 
-  useEffect(() => {
-    if (reviews.length === range) {
-      setIsPending(false);
-    }
-  }, [reviews, range]);
-
   return (
     <div className="container px-4 xl:px-20">
       <h2 className="text-2xl font-bold text-gradient mb-4">Reviews</h2>
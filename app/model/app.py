@@ -9,6 +9,8 @@ os.environ["HF_HUB_DISABLE_XET"] = "1"
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
 import sys
+import threading
+import time
 
 HERE = os.path.dirname(__file__)
 PROJECT_ROOT = os.path.abspath(os.path.join(HERE, os.pardir))
@@ -17,32 +19,126 @@ sys.path.insert(0, PROJECT_ROOT)
 import warnings
 warnings.filterwarnings('ignore')
 
-from model.InstructABSA.utils import T5Generator
+from model.InstructABSA.snapshots import resolve_snapshot, weights_fingerprint
+from model.InstructABSA.utils import T5Generator, length_bucketed_batches, padding_ratio
 from model.instructions import InstructionsHandler
+from service.batcher import MicroBatcher
+from service.cache import PredictionCache
+from service.constraints import InputVocabularyLogitsProcessor
+from service.chunking import SENTENCE_RE, split_sentences, pack_windows, merge_outputs
+from service.decoding import DECODE_PROFILES, ASSISTED_PROFILES, get_decode_kwargs
+from service import metrics
+from service.profiling import StageProfiler
+from service.prompt import PromptEncoder
+from service.prefilter import NoAspectPrefilter, NO_ASPECT_OUTPUT
 import torch
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+from transformers import LogitsProcessorList
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
-import re
 
+_generator = None
 _tokenizer = None
 _model     = None
 _device    = None
+_draft_model = None
+_model_lock = threading.Lock()
+_draft_model_lock = threading.Lock()
 
 task_name = 'aoste'
 experiment_name = 'aspe-absa2'
-model_checkpoint = 'PhatLe12344/AOSTE_InstructABSA'
+model_checkpoint = os.getenv("MODEL_CHECKPOINT", 'PhatLe12344/AOSTE_InstructABSA')
 print('Model checkpoint from Hugging Face Hub:', model_checkpoint)
 
+# Inference backend: eager PyTorch ("torch"), ONNX Runtime on CPU ("onnx")
+# or the dynamic int8 quantized model ("int8")
+MODEL_BACKEND       = os.getenv("MODEL_BACKEND", "torch")
+ONNX_MODEL_DIR      = os.getenv("ONNX_MODEL_DIR", os.path.join(HERE, "onnx_model"))
+QUANTIZED_MODEL_DIR = os.getenv("QUANTIZED_MODEL_DIR", os.path.join(HERE, "quantized_model"))
+if MODEL_BACKEND not in ("torch", "onnx", "int8"):
+    raise ValueError(f"Unknown MODEL_BACKEND '{MODEL_BACKEND}'. Choose 'torch', 'onnx' or 'int8'.")
+
 instr = InstructionsHandler()
 instr.load_instruction_set2()
 bos   = instr.aoste['bos_instruct1']
 delim = instr.aoste['delim_instruct']
 eos   = instr.aoste['eos_instruct']
 
+# Micro-batching: concurrent /predict calls are grouped into one generate call
+BATCH_MAX_SIZE    = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+# A batch is split into sub-batches whose review lengths differ by at most this many tokens (0: sort only)
+BATCH_BUCKET_WIDTH = int(os.getenv("BATCH_BUCKET_WIDTH", "64"))
+
+# Decode profile used when a request does not pick one (greedy, beam-2, beam-4, assisted)
+DECODE_PROFILE = os.getenv("DECODE_PROFILE", "beam-4")
+get_decode_kwargs(DECODE_PROFILE)
+
+# Small draft T5 sharing the main model's vocabulary; enables the "assisted" profile
+DRAFT_MODEL_CHECKPOINT = os.getenv("DRAFT_MODEL_CHECKPOINT") or None
+if DRAFT_MODEL_CHECKPOINT is not None and MODEL_BACKEND == "onnx":
+    raise ValueError("DRAFT_MODEL_CHECKPOINT requires MODEL_BACKEND 'torch' or 'int8'.")
+if DECODE_PROFILE in ASSISTED_PROFILES and DRAFT_MODEL_CHECKPOINT is None:
+    raise ValueError(f"DECODE_PROFILE '{DECODE_PROFILE}' requires DRAFT_MODEL_CHECKPOINT.")
+
+# Tokenize the instruction prefix/suffix once and only tokenize review text per request
+PRETOKENIZE_PROMPT = os.getenv("PRETOKENIZE_PROMPT", "1") == "1"
+_prompt_encoders: Dict[Tuple[str, str, str], PromptEncoder] = {}
+_prompt_encoders_lock = threading.Lock()
+profiler = StageProfiler(metrics.STAGE_SECONDS, metrics.PADDING_RATIO)
+
+# Only let generate() pick tokens of the input review, the AOSTE delimiters and polarity labels
+CONSTRAIN_TO_INPUT = os.getenv("CONSTRAIN_TO_INPUT", "0") == "1"
+
+# Long reviews: split into sentence windows that fit the prompt instead of truncating them
+CHUNK_LONG_REVIEWS = os.getenv("CHUNK_LONG_REVIEWS", "1") == "1"
+
+# Optional "no-aspect" pre-filter trained by tools/train_prefilter.py; reviews it
+# confidently marks as aspect-free skip generation
+PREFILTER_PATH = os.getenv("PREFILTER_PATH") or None
+prefilter = NoAspectPrefilter.load(PREFILTER_PATH) if PREFILTER_PATH else None
+if prefilter is not None and os.getenv("PREFILTER_THRESHOLD"):
+    prefilter.threshold = float(os.getenv("PREFILTER_THRESHOLD"))
+
+# Load and warm the model in the background at startup; /ready reports 503 until done
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+WARMUP_REVIEWS = [
+    "Great movie.",
+    "The plot was gripping and the lead actor delivered an unforgettable performance. "
+    "The soundtrack, however, felt generic and the ending dragged on.",
+    " ".join([
+        "The film's breathtaking visuals and seamless CGI created an immersive world.",
+        "Sadly the dialogue is clumsy and most of the supporting cast is wasted.",
+        "The pacing in the second act is painfully slow, yet the final battle is spectacular.",
+    ] * 6),
+]
+_ready = threading.Event()
+_startup_seconds: Optional[float] = None
+_startup_error: Optional[str] = None
+
+# Prediction cache: in-memory LRU, plus a SQLite tier when CACHE_DB_PATH is set.
+# Keyed by the weights actually served, so a re-published int8/ONNX model or a
+# new snapshot does not serve predictions cached for the previous one.
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "4096"))
+CACHE_DB_PATH  = os.getenv("CACHE_DB_PATH") or None
+MODEL_PATH = {"onnx": ONNX_MODEL_DIR, "int8": QUANTIZED_MODEL_DIR}.get(MODEL_BACKEND) or resolve_snapshot(model_checkpoint)
+cache = PredictionCache(
+    namespace=f"{os.path.realpath(MODEL_PATH) if os.path.isdir(MODEL_PATH) else MODEL_PATH}\x1f{weights_fingerprint(MODEL_PATH)}\x1f{MODEL_BACKEND}\x1f{CHUNK_LONG_REVIEWS}\x1f{CONSTRAIN_TO_INPUT}\x1f{bos}\x1f{delim}\x1f{eos}",
+    max_size=CACHE_MAX_SIZE,
+    db_path=CACHE_DB_PATH
+)
+metrics.register_cache(cache)
+
 # Pydantic schema
 class ReviewRequest(BaseModel):
     review: str
+    decode_profile: Optional[str] = None
+
+class ReviewBatchRequest(BaseModel):
+    reviews: List[str]
+    decode_profile: Optional[str] = None
 
 class UnifiedAspectPolarity(BaseModel):
     aspects: List[str]
@@ -66,14 +162,54 @@ app = FastAPI(
     openapi_url="/openapi.json"
 )
 def load_model():
-    global _tokenizer, _model, _device
+    global _generator, _tokenizer, _model, _device
+    # The warm-up thread, the micro-batcher and request threads may all get
+    # here first: only one of them loads the model, the others wait for it
     if _model is None or _tokenizer is None:
-        t5_exp = T5Generator(model_checkpoint, max_new_tokens=128)
-        _tokenizer = t5_exp.tokenizer
-        _model     = t5_exp.model.to(t5_exp.device)
-        _device    = t5_exp.device
+        with _model_lock:
+            if _model is None or _tokenizer is None:
+                if MODEL_BACKEND == "onnx":
+                    t5_exp = T5Generator(ONNX_MODEL_DIR, max_new_tokens=128, backend="onnx")
+                elif MODEL_BACKEND == "int8":
+                    t5_exp = T5Generator(QUANTIZED_MODEL_DIR, max_new_tokens=128, backend="int8")
+                else:
+                    t5_exp = T5Generator(model_checkpoint, max_new_tokens=128)
+                    t5_exp.model.eval()
+                _generator = t5_exp
+                _tokenizer = t5_exp.tokenizer
+                _device    = t5_exp.device
+                # set last: the unlocked check above treats a non-None model as fully loaded
+                _model     = t5_exp.model.to(t5_exp.device)
     return _tokenizer, _model, _device
 
+def load_draft_model():
+    global _draft_model
+    if _draft_model is None:
+        with _draft_model_lock:
+            if _draft_model is None:
+                _, model, device = load_model()
+                draft = T5Generator(DRAFT_MODEL_CHECKPOINT, max_new_tokens=128)
+                if draft.model.config.vocab_size != model.config.vocab_size:
+                    raise ValueError(f"Draft model '{DRAFT_MODEL_CHECKPOINT}' does not share the main model's vocabulary.")
+                draft.model.eval()
+                _draft_model = draft.model.to(device)
+    return _draft_model
+
+def get_prompt_encoder(bos_instruction: str, delim_instruction: str, eos_instruction: str) -> PromptEncoder:
+    key = (bos_instruction, delim_instruction, eos_instruction)
+    encoder = _prompt_encoders.get(key)
+    if encoder is None:
+        with _prompt_encoders_lock:
+            encoder = _prompt_encoders.get(key)
+            if encoder is None:
+                tokenizer, _, _ = load_model()
+                encoder = _prompt_encoders[key] = PromptEncoder(tokenizer, bos_instruction, delim_instruction, eos_instruction)
+    return encoder
+
+def get_generator() -> T5Generator:
+    load_model()
+    return _generator
+
 def get_word_positions_1idx(content: str, phrase: str) -> Tuple[int, int]:
     """
     Trả về vị trí start/end của `phrase` trong `content`,
@@ -89,65 +225,174 @@ def get_word_positions_1idx(content: str, phrase: str) -> Tuple[int, int]:
             return idx + 1, idx + len(phrase_words)
     return -1, -1
 
-# Single inference function
-def absa_inference_single(text: str, bos_instruction: str, delim_instruction: str, eos_instruction: str) -> Tuple[str, List[Tuple[str, str, str]]]:
+def parse_triplets(decoded: str) -> List[Tuple[str, str, str]]:
+    # parse aspect:opinion:polarity
+    results: List[Tuple[str, str, str]] = []
+    for seg in decoded.split(","):
+        parts = [p.strip() for p in seg.split(":")]
+        # Chỉ xử lý khi đúng 3 phần
+        if len(parts) == 3:
+            aspect, opinion, polarity = parts
+            results.append((aspect, opinion, polarity))
+    return results
+
+# Batched inference function
+def absa_inference_batch(texts: List[str], bos_instruction: str, delim_instruction: str, eos_instruction: str, profile: str = DECODE_PROFILE, text_ids: Optional[List[List[int]]] = None) -> List[Tuple[str, List[Tuple[str, str, str]]]]:
+    if profile in ASSISTED_PROFILES and len(texts) > 1:
+        # assisted generation decodes one sequence at a time
+        return [result
+                for i, text in enumerate(texts)
+                for result in absa_inference_batch([text], bos_instruction, delim_instruction, eos_instruction, profile,
+                                                   None if text_ids is None else [text_ids[i]])]
     tokenizer, model, device = load_model()
-    # build prompt
-    prompt = f"{bos_instruction}{text}{delim_instruction}{eos_instruction}"
-    # tokenize without fixed max length, cap at model capacity
-    inputs = tokenizer(
-        prompt,
-        return_tensors='pt',
-        add_special_tokens=True,
-        truncation=True,
-        max_length=tokenizer.model_max_length
-    ).to(device)
+    decode_kwargs = get_decode_kwargs(profile)
+    if profile in ASSISTED_PROFILES:
+        decode_kwargs["assistant_model"] = load_draft_model()
+    # text_ids were tokenized, and their requests counted, in the chunker's tokenize stage
+    with profiler.time("tokenize", len(texts) if text_ids is None else 0):
+        if PRETOKENIZE_PROMPT:
+            # concatenate cached instruction token ids around the review tokens
+            encoder = get_prompt_encoder(bos_instruction, delim_instruction, eos_instruction)
+            if text_ids is None:
+                inputs = encoder.encode(texts)
+            else:
+                inputs = encoder.pad([encoder.build(ids) for ids in text_ids])
+        else:
+            # build prompts and tokenize the whole batch, pad to the longest prompt, cap at model capacity
+            prompts = [f"{bos_instruction}{text}{delim_instruction}{eos_instruction}" for text in texts]
+            inputs = tokenizer(
+                prompts,
+                return_tensors='pt',
+                add_special_tokens=True,
+                padding=True,
+                truncation=True,
+                max_length=tokenizer.model_max_length
+            )
+        if CONSTRAIN_TO_INPUT:
+            decode_kwargs["logits_processor"] = LogitsProcessorList([InputVocabularyLogitsProcessor(tokenizer, texts)])
+    prompt_lengths = inputs['attention_mask'].sum(dim=1).tolist()
+    profiler.observe_padding(padding_ratio(prompt_lengths))
+    metrics.BATCH_SIZE.set(len(texts))
+    metrics.INPUT_TOKENS.inc(sum(prompt_lengths))
+    inputs = inputs.to(device)
     # dynamic max_length: prompt_len + max_new_tokens
     prompt_len = inputs['input_ids'].shape[1]
     max_length = prompt_len + 128
-    model.eval()
-    with torch.no_grad():
+    with profiler.time("generate", len(texts)), torch.no_grad():
         outputs = model.generate(
             **inputs,
             max_length=max_length,
-            num_beams=4,
-            num_return_sequences=4,
-            early_stopping=True,
-            use_cache=True
+            use_cache=True,
+            **decode_kwargs
         )
-    decoded = tokenizer.decode(outputs[0], skip_special_tokens=True).strip()
-    print("DEBUG decoded:", decoded)
-    # parse aspect:polarity
-    results: List[Tuple[str, str, str]] = []
-    for seg in decoded.split(","):
-        parts = [p.strip() for p in seg.split(":")]
-        # Chỉ xử lý khi đúng 3 phần
-        if len(parts) == 3:
-            aspect, opinion, polarity = parts
-            results.append((aspect, opinion, polarity))
+    metrics.OUTPUT_TOKENS.inc(int((outputs != tokenizer.pad_token_id).sum()))
+    # one returned sequence per input
+    results = []
+    with profiler.time("postprocess", len(texts)):
+        for output in outputs:
+            decoded = tokenizer.decode(output, skip_special_tokens=True).strip()
+            print("DEBUG decoded:", decoded)
+            results.append((decoded, parse_triplets(decoded)))
+    return results
 
-    return decoded, results
+# Length-bucketed inference: windows are sorted by token length and split into
+# sub-batches so short reviews are not padded up to the longest one
+def absa_inference_bucketed(texts: List[str], text_ids: List[List[int]], bos_instruction: str, delim_instruction: str, eos_instruction: str, profile: str = DECODE_PROFILE) -> List[Tuple[str, List[Tuple[str, str, str]]]]:
+    results = [None] * len(texts)
+    for batch in length_bucketed_batches([len(ids) for ids in text_ids], BATCH_MAX_SIZE, BATCH_BUCKET_WIDTH):
+        outputs = absa_inference_batch([texts[i] for i in batch], bos_instruction, delim_instruction, eos_instruction,
+                                       profile, [text_ids[i] for i in batch])
+        for i, output in zip(batch, outputs):
+            results[i] = output
+    return results
 
-# Endpoint
-@app.post("/predict", response_model=PredictionResponse, tags=["absa"], response_model_exclude_none=True)
-def predict(request: ReviewRequest) -> PredictionResponse:
-    # 1. Read and validate input review text
-    text = request.review.strip()
-    if not text:
-        # Nếu review rỗng, trả về HTTP 400
-        raise HTTPException(status_code=400, detail="Review text cannot be empty.")
+# Chunked inference: reviews longer than the token budget are split into sentence
+# windows, all windows are batched together and their triplets are merged per review
+def absa_inference_chunked(texts: List[str], bos_instruction: str, delim_instruction: str, eos_instruction: str, profile: str = DECODE_PROFILE) -> List[Tuple[str, List[Tuple[str, str, str]]]]:
+    if not CHUNK_LONG_REVIEWS and not PRETOKENIZE_PROMPT:
+        # Nothing needs the review tokens up front: each model batch tokenizes its full prompts once
+        return [result
+                for start in range(0, len(texts), BATCH_MAX_SIZE)
+                for result in absa_inference_batch(texts[start:start + BATCH_MAX_SIZE], bos_instruction, delim_instruction, eos_instruction, profile)]
+    encoder = get_prompt_encoder(bos_instruction, delim_instruction, eos_instruction)
+    windows: List[str] = []
+    window_ids: List[List[int]] = []
+    owners: List[int] = []
+    with profiler.time("tokenize", len(texts)):
+        for i, (text, ids) in enumerate(zip(texts, encoder.text_ids(texts))):
+            if not CHUNK_LONG_REVIEWS or len(ids) <= encoder.text_budget:
+                text_windows, text_window_ids = [text], [ids]
+            else:
+                sentences = split_sentences(text)
+                text_windows = pack_windows(sentences, [len(ids) for ids in encoder.text_ids(sentences)], encoder.text_budget)
+                text_window_ids = encoder.text_ids(text_windows)
+            windows.extend(text_windows)
+            window_ids.extend(text_window_ids)
+            owners.extend([i] * len(text_windows))
+    outputs = absa_inference_bucketed(windows, window_ids, bos_instruction, delim_instruction, eos_instruction, profile)
+    if len(windows) == len(texts):
+        return outputs
+    return [merge_outputs([output for owner, output in zip(owners, outputs) if owner == i]) for i in range(len(texts))]
+
+# Cached inference: only reviews never seen before go through the model
+def absa_inference_cached(texts: List[str], profile: str = DECODE_PROFILE) -> List[Tuple[str, List[Tuple[str, str, str]]]]:
+    results = [None] * len(texts)
+    if prefilter is not None:
+        skipped = prefilter.skip_mask(texts)
+        metrics.PREFILTER_REVIEWS.labels("skipped").inc(sum(skipped))
+        metrics.PREFILTER_REVIEWS.labels("generated").inc(len(texts) - sum(skipped))
+        for i, skip in enumerate(skipped):
+            if skip:
+                results[i] = (NO_ASPECT_OUTPUT, [tuple(NO_ASPECT_OUTPUT.split(":"))])
+    keys = [cache.key(text, profile) for text in texts]
+    for i, key in enumerate(keys):
+        if results[i] is None:
+            results[i] = cache.get(key)
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        outputs = absa_inference_chunked([texts[i] for i in missing], bos, delim, eos, profile)
+        for i, output in zip(missing, outputs):
+            cache.set(keys[i], output)
+            results[i] = output
+    return [(raw_output, [tuple(t) for t in triples]) for raw_output, triples in results]
+
+# Micro-batcher handler: items are (text, profile), each profile gets its own generate call
+def absa_inference_requests(items: List[Tuple[str, str]]) -> List[Tuple[str, List[Tuple[str, str, str]]]]:
+    results = [None] * len(items)
+    for profile in dict.fromkeys(profile for _, profile in items):
+        indices = [i for i, (_, p) in enumerate(items) if p == profile]
+        outputs = absa_inference_cached([items[i][0] for i in indices], profile)
+        for i, output in zip(indices, outputs):
+            results[i] = output
+    return results
 
-    # 2. Gọi hàm inference để lấy raw_output và cặp (aspect, polarity)
-    raw_output, triples = absa_inference_single(text, bos, delim, eos)
+# Single inference function
+def absa_inference_single(text: str, bos_instruction: str, delim_instruction: str, eos_instruction: str, profile: str = DECODE_PROFILE) -> Tuple[str, List[Tuple[str, str, str]]]:
+    return absa_inference_chunked([text], bos_instruction, delim_instruction, eos_instruction, profile)[0]
+
+def resolve_decode_profile(profile: Optional[str]) -> str:
+    profile = profile or DECODE_PROFILE
+    if profile not in DECODE_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown decode profile. Choose one of: {', '.join(DECODE_PROFILES)}")
+    if profile in ASSISTED_PROFILES and DRAFT_MODEL_CHECKPOINT is None:
+        raise HTTPException(status_code=400, detail=f"Decode profile '{profile}' is not enabled: set DRAFT_MODEL_CHECKPOINT.")
+    return profile
 
-    # 3. Tách toàn bộ review thành câu con dựa trên dấu . ! ?
-    sentence_re = re.compile(r'(?<=[.!?])\s*')
-    sentences = sentence_re.split(text)
+batcher = MicroBatcher(
+    absa_inference_requests,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS
+)
+metrics.QUEUE_DEPTH.set_function(batcher.qsize)
 
-    # 4. Gom nhóm các cặp theo từng câu (content) và tính vị trí trong content
+def build_prediction(text: str, raw_output: str, triples: List[Tuple[str, str, str]]) -> PredictionResponse:
+    # 1. Tách toàn bộ review thành câu con dựa trên dấu . ! ?
+    sentences = SENTENCE_RE.split(text)
+
+    # 2. Gom nhóm các cặp theo từng câu (content) và tính vị trí trong content
     grouped: Dict[str, Dict[str, List]] = {}
     for asp, opin, pol in triples:
-        # 4.1. Xác định câu chứa aspect (nếu không tìm thấy thì dùng toàn review)
+        # 2.1. Xác định câu chứa aspect (nếu không tìm thấy thì dùng toàn review)
         content = next(
             (s for s in sentences if asp.lower() in s.lower() and opin.lower() in s.lower()),
             text
@@ -157,19 +402,18 @@ def predict(request: ReviewRequest) -> PredictionResponse:
                 "aspects": [], "opinions": [], "polarities": [],
                 "pos_aspect": [], "pos_opin": []
             }
-        # 4.2. Tính vị trí start và end của aspect trong câu content
+        # 2.2. Tính vị trí start và end của aspect trong câu content
         start_asp, end_asp = get_word_positions_1idx(content, asp)
         start_op, end_op = get_word_positions_1idx(content, opin)
-        # 4.3. Khởi tạo group nếu câu chưa có
 
-        # 4.4. Thêm aspect, polarity và position vào nhóm
+        # 2.3. Thêm aspect, polarity và position vào nhóm
         grouped[content]["aspects"].append(asp)
         grouped[content]["opinions"].append(opin)
         grouped[content]["polarities"].append(pol)
         grouped[content]["pos_aspect"].append((start_asp, end_asp))
         grouped[content]["pos_opin"].append((start_op, end_op))
 
-    # 5. Build result list, dedup identical (asp, pol, pos)
+    # 3. Build result list, dedup identical (asp, pol, pos)
     results: List[UnifiedAspectPolarity] = []
     for content, data in grouped.items():
         # dedupe while preserving order
@@ -200,6 +444,102 @@ def predict(request: ReviewRequest) -> PredictionResponse:
 
     return PredictionResponse(raw_output=raw_output, results=results)
 
+# Endpoint
+@app.post("/predict", response_model=PredictionResponse, tags=["absa"], response_model_exclude_none=True)
+def predict(request: ReviewRequest) -> PredictionResponse:
+    # 1. Read and validate input review text
+    text = request.review.strip()
+    if not text:
+        # Nếu review rỗng, trả về HTTP 400
+        raise HTTPException(status_code=400, detail="Review text cannot be empty.")
+    profile = resolve_decode_profile(request.decode_profile)
+
+    # 2. Gọi hàm inference (qua micro-batcher) để lấy raw_output và cặp (aspect, polarity)
+    raw_output, triples = batcher.submit((text, profile)).result()
+
+    # 3. Gom nhóm kết quả theo từng câu
+    return build_prediction(text, raw_output, triples)
+
+@app.post("/predict_batch", response_model=List[PredictionResponse], tags=["absa"], response_model_exclude_none=True)
+def predict_batch(request: ReviewBatchRequest) -> List[PredictionResponse]:
+    # 1. Read every review text; empty reviews get an empty prediction instead
+    #    of failing the whole batch
+    texts = [review.strip() for review in request.reviews]
+    profile = resolve_decode_profile(request.decode_profile)
+
+    # 2. Run inference on length-bucketed, padded batches of at most BATCH_MAX_SIZE reviews
+    scored = [i for i, text in enumerate(texts) if text]
+    outputs = dict(zip(scored, absa_inference_cached([texts[i] for i in scored], profile))) if scored else {}
+
+    # 3. One PredictionResponse per review, same order as the request
+    return [build_prediction(text, *outputs[i]) if i in outputs else PredictionResponse(raw_output="", results=[])
+            for i, text in enumerate(texts)]
+
+@app.post("/predict_stream", tags=["absa"])
+def predict_stream(request: ReviewRequest) -> StreamingResponse:
+    # 1. Read and validate input review text
+    text = request.review.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Review text cannot be empty.")
+    profile = resolve_decode_profile(request.decode_profile)
+
+    # 2. Queue every sentence on the micro-batcher up front
+    sentences = split_sentences(text)
+    futures = [batcher.submit((sentence, profile)) for sentence in sentences]
+
+    # 3. Emit one UnifiedAspectPolarity per line (NDJSON), in sentence order, as soon as each is decoded
+    def stream():
+        for sentence, future in zip(sentences, futures):
+            raw_output, triples = future.result()
+            for group in build_prediction(sentence, raw_output, triples).results:
+                yield group.model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/cache/stats", tags=["absa"])
+def cache_stats():
+    return cache.stats()
+
+@app.get("/profile", tags=["absa"])
+def profile_stats():
+    return {"pretokenize_prompt": PRETOKENIZE_PROMPT, "stages": profiler.snapshot(), "padding": profiler.padding()}
+
+def warm_up():
+    global _startup_seconds, _startup_error
+    start = time.perf_counter()
+    try:
+        load_model()
+        if DRAFT_MODEL_CHECKPOINT is not None:
+            load_draft_model()
+        # a few uncached generations of representative lengths, short to long
+        for review in WARMUP_REVIEWS:
+            absa_inference_chunked([review], bos, delim, eos)
+        _startup_seconds = time.perf_counter() - start
+        metrics.STARTUP_SECONDS.set(_startup_seconds)
+        print(f"Model warm-up finished in {_startup_seconds:.2f}s (startup_seconds={_startup_seconds:.3f})")
+        _ready.set()
+    except Exception as e:
+        _startup_error = str(e)
+        print("Model warm-up failed:", e)
+
+@app.on_event("startup")
+def start_warm_up():
+    if WARMUP_ON_STARTUP:
+        threading.Thread(target=warm_up, name="model-warm-up", daemon=True).start()
+    else:
+        _ready.set()
+
+@app.get("/ready", tags=["health"])
+def ready():
+    body = {"ready": _ready.is_set(), "startup_seconds": _startup_seconds}
+    if _startup_error is not None:
+        body["error"] = _startup_error
+    return JSONResponse(body, status_code=200 if _ready.is_set() else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # Endpoint root để kiểm tra
 @app.get("/", include_in_schema=False)
 def root():
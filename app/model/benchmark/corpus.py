@@ -0,0 +1,45 @@
+import random
+from typing import Dict, List
+
+from model.InstructABSA.corpus import load_reviews
+
+# Word-count boundaries of the length classes used by length mixes
+LENGTH_CLASSES = {
+    'short': (0, 20),
+    'medium': (20, 80),
+    'long': (80, None),
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse a length mix such as "short=0.5,medium=0.3,long=0.2"."""
+    weights = {}
+    for part in mix.split(','):
+        name, weight = part.split('=')
+        if name not in LENGTH_CLASSES:
+            raise Exception(f'Unknown length class "{name}". Choose from: {", ".join(LENGTH_CLASSES)}')
+        weights[name] = float(weight)
+    return weights
+
+
+def build_corpus(reviews: List[str], size: int, mix: str, seed: int = 1999) -> List[str]:
+    """
+    Draw a fixed, reproducible corpus of `size` reviews following the length mix.
+    Classes with no reviews in the source are skipped.
+    """
+    rng = random.Random(seed)
+    by_class = {name: [] for name in LENGTH_CLASSES}
+    for review in reviews:
+        words = len(review.split())
+        for name, (low, high) in LENGTH_CLASSES.items():
+            if words >= low and (high is None or words < high):
+                by_class[name].append(review)
+                break
+    weights = {name: weight for name, weight in parse_mix(mix).items() if by_class[name]}
+    if not weights:
+        raise Exception('No review matches the requested length mix.')
+    names = list(weights)
+    corpus = []
+    for name in rng.choices(names, weights=[weights[n] for n in names], k=size):
+        corpus.append(rng.choice(by_class[name]))
+    return corpus
@@ -0,0 +1,81 @@
+"""
+Latency vs. triplet F1 for every decode profile.
+
+Usage (from app/model):
+    python -m benchmark.decode_profiles -data_path ../../model/Dataset/SemEval16/Test/Restaurants_Opinion_Test.json
+"""
+import json
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, os.pardir)))
+
+import app as model_app
+from service.decoding import DECODE_PROFILES, ASSISTED_PROFILES
+from benchmark.eval_set import load_eval_set, triplet_metrics
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Benchmark decode profiles')
+    parser.add_argument('-data_path', help='SemEval *_Opinion_*.json file, or CSV with review texts and AOSTE labels', type=str, required=True)
+    parser.add_argument('-text_col', help='Column holding the review text', default='raw_text', type=str)
+    parser.add_argument('-label_col', help='Column holding the gold triplets', default='labels', type=str)
+    # assisted profiles need a draft model (DRAFT_MODEL_CHECKPOINT)
+    profiles = [p for p in DECODE_PROFILES if p not in ASSISTED_PROFILES or model_app.DRAFT_MODEL_CHECKPOINT]
+    parser.add_argument('-profiles', help='Comma separated profiles', default=','.join(profiles), type=str)
+    parser.add_argument('-batch_size', help='Reviews per generate call', default=8, type=int)
+    parser.add_argument('-limit', help='Only use the first N rows', type=int)
+    parser.add_argument('-output', help='Write the report as JSON to this path', type=str)
+    return parser
+
+
+def main():
+    args = setup_parser().parse_args()
+    texts, labels = load_eval_set(args.data_path, args.text_col, args.label_col, args.limit)
+    generator = model_app.get_generator()
+    print('Loaded', len(texts), 'reviews from', args.data_path)
+
+    report = []
+    preds_by_profile = {}
+    for profile in args.profiles.split(','):
+        # Warm up so the first batch does not pay one-off costs
+        model_app.absa_inference_batch(texts[:1], model_app.bos, model_app.delim, model_app.eos, profile)
+        preds, latencies = [], []
+        for i in range(0, len(texts), args.batch_size):
+            batch = texts[i:i + args.batch_size]
+            start = time.perf_counter()
+            outputs = model_app.absa_inference_batch(batch, model_app.bos, model_app.delim, model_app.eos, profile)
+            latencies.append((time.perf_counter() - start) / len(batch))
+            preds.extend(raw_output for raw_output, _ in outputs)
+        preds_by_profile[profile] = preds
+        precision, recall, f1 = triplet_metrics(generator, labels, preds)
+        report.append({
+            'profile': profile,
+            'reviews': len(texts),
+            'mean_latency_ms': 1000 * sum(latencies) / len(latencies),
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+        })
+
+    # Assisted decoding must reproduce the main model's greedy output exactly
+    if 'greedy' in preds_by_profile:
+        for row in report:
+            if row['profile'] in ASSISTED_PROFILES:
+                same = sum(a == b for a, b in zip(preds_by_profile[row['profile']], preds_by_profile['greedy']))
+                row['matches_greedy'] = same / len(texts)
+                print(f"{row['profile']}: {same}/{len(texts)} outputs identical to greedy")
+
+    print(f"{'profile':<10}{'ms/review':>12}{'precision':>12}{'recall':>10}{'f1':>10}")
+    for row in report:
+        print(f"{row['profile']:<10}{row['mean_latency_ms']:>12.1f}{row['precision']:>12.4f}{row['recall']:>10.4f}{row['f1']:>10.4f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+import torch
+
+from model.InstructABSA.data_prep import DatasetLoader
+
+
+def load_eval_set(data_path: str, text_col: str = 'raw_text', label_col: str = 'labels', limit: int = None) -> Tuple[List[str], List[str]]:
+    """
+    Load review texts and AOSTE gold labels ("aspect:opinion:polarity, ...") from
+    a SemEval *_Opinion_*.json file (e.g. model/Dataset/SemEval16/Test/Restaurants_Opinion_Test.json),
+    whose aspect and opinion spans are turned into triplets like run_model.py does,
+    or from a CSV with a text and a label column.
+    """
+    if data_path.endswith('.json'):
+        df = DatasetLoader().create_data_in_aoste_format(pd.read_json(data_path), 'term', 'polarity', 'raw_words', 'aspects', 'opinions')
+        text_col, label_col = 'raw_words', 'labels'
+    else:
+        df = pd.read_csv(data_path)
+    for col in (text_col, label_col):
+        if col not in df.columns:
+            raise Exception(f'Column "{col}" not found in {data_path}. Available columns: {", ".join(df.columns)}')
+    df = df[[text_col, label_col]].dropna()
+    if limit is not None:
+        df = df.head(limit)
+    return df[text_col].astype(str).tolist(), df[label_col].astype(str).str.strip().tolist()
+
+
+def triplet_metrics(generator, y_true: List[str], y_pred: List[str]) -> Tuple[float, float, float]:
+    """
+    Precision, recall and F1 from T5Generator.get_metrics in triplet extraction mode.
+    """
+    precision, recall, f1, _ = generator.get_metrics(y_true, y_pred, is_triplet_extraction=True)
+    return precision, recall, f1
+
+
+def predict_texts(generator, texts: List[str], bos_instruction: str, delim_instruction: str, eos_instruction: str,
+                  decode_kwargs: Dict[str, Any], batch_size: int = 8) -> List[str]:
+    """
+    Decoded model outputs for `texts`, using `generator`'s own tokenizer and model.
+    """
+    preds = []
+    for i in range(0, len(texts), batch_size):
+        prompts = [f"{bos_instruction}{text}{delim_instruction}{eos_instruction}" for text in texts[i:i + batch_size]]
+        inputs = generator.tokenizer(prompts, return_tensors='pt', padding=True, truncation=True,
+                                     max_length=generator.tokenizer.model_max_length)
+        with torch.no_grad():
+            output_ids = generator.model.generate(**inputs, max_length=inputs['input_ids'].shape[1] + 128,
+                                                  use_cache=True, **decode_kwargs)
+        preds.extend(text.strip() for text in generator.tokenizer.batch_decode(output_ids, skip_special_tokens=True))
+    return preds
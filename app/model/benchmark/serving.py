@@ -0,0 +1,141 @@
+"""
+Reproducible inference benchmark for the model service.
+
+Replays a fixed corpus of reviews at several concurrency levels against
+absa_inference_single in-process and/or the HTTP /predict endpoint, for every
+requested decode profile, and reports p50/p95/p99 latency, reviews/sec and
+tokens/sec. Results are written as JSON so runs can be compared across commits.
+
+Usage (from app/model):
+    python -m benchmark.serving -data_paths ../../model/Data/test.csv -backends inprocess,http \\
+        -concurrency 1,4,16 -mix short=0.5,medium=0.3,long=0.2 -output bench.json
+
+For HTTP runs start the service with CACHE_MAX_SIZE=0 and without
+CACHE_DB_PATH, otherwise repeated reviews are served from the cache.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, os.pardir)))
+
+import numpy as np
+
+from benchmark.corpus import build_corpus, load_reviews
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Benchmark the model service')
+    parser.add_argument('-data_paths', help='Comma separated CSV / crawler JSON files', required=True, type=str)
+    parser.add_argument('-text_col', default='raw_text', type=str)
+    parser.add_argument('-size', help='Number of reviews in the corpus', default=200, type=int)
+    parser.add_argument('-mix', help='Length mix, e.g. short=0.5,medium=0.3,long=0.2', default='short=0.5,medium=0.3,long=0.2', type=str)
+    parser.add_argument('-seed', default=1999, type=int)
+    parser.add_argument('-backends', help='inprocess and/or http', default='inprocess', type=str)
+    parser.add_argument('-url', help='Base URL of the model service for http runs', default='http://localhost:8000', type=str)
+    parser.add_argument('-concurrency', help='Comma separated concurrency levels', default='1,4', type=str)
+    parser.add_argument('-profiles', help='Comma separated decode profiles', default='beam-4', type=str)
+    parser.add_argument('-output', help='Write results as JSON to this path', type=str)
+    # same default as app.py, whose tokenizer the served model uses
+    parser.add_argument('-model_checkpoint', help='Checkpoint whose tokenizer counts the corpus tokens',
+                        default=os.getenv('MODEL_CHECKPOINT', 'PhatLe12344/AOSTE_InstructABSA'), type=str)
+    return parser
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=HERE, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def count_tokens(corpus, model_checkpoint):
+    from transformers import AutoTokenizer
+    from model.InstructABSA.snapshots import resolve_snapshot
+
+    tokenizer = AutoTokenizer.from_pretrained(resolve_snapshot(model_checkpoint))
+    return sum(len(ids) for ids in tokenizer(corpus, add_special_tokens=False)['input_ids'])
+
+
+def inprocess_call(profile):
+    import app as model_app
+
+    model_app.load_model()
+
+    def call(review):
+        model_app.absa_inference_single(review, model_app.bos, model_app.delim, model_app.eos, profile)
+    return call
+
+
+def http_call(url, profile):
+    import httpx
+
+    client = httpx.Client(base_url=url, timeout=None)
+
+    def call(review):
+        response = client.post('/predict', json={'review': review, 'decode_profile': profile})
+        response.raise_for_status()
+    return call
+
+
+def replay(call, corpus, concurrency):
+    """Send every review of the corpus through `call` with `concurrency` threads."""
+    def timed(review):
+        start = time.perf_counter()
+        call(review)
+        return time.perf_counter() - start
+
+    # one warm-up request outside the measurement
+    call(corpus[0])
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, corpus))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    args = setup_parser().parse_args()
+    corpus = build_corpus(load_reviews(args.data_paths.split(','), args.text_col), args.size, args.mix, args.seed)
+    tokens = count_tokens(corpus, args.model_checkpoint)
+    print(f'Corpus: {len(corpus)} reviews, {tokens} tokens')
+
+    results = []
+    for backend in args.backends.split(','):
+        for profile in args.profiles.split(','):
+            call = inprocess_call(profile) if backend == 'inprocess' else http_call(args.url, profile)
+            for concurrency in (int(c) for c in args.concurrency.split(',')):
+                latencies, wall = replay(call, corpus, concurrency)
+                p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+                row = {
+                    'backend': backend,
+                    'decode_profile': profile,
+                    'concurrency': concurrency,
+                    'p50_ms': p50,
+                    'p95_ms': p95,
+                    'p99_ms': p99,
+                    'reviews_per_sec': len(corpus) / wall,
+                    'tokens_per_sec': tokens / wall,
+                }
+                results.append(row)
+                print(f"{backend:<10}{profile:<8} c={concurrency:<4} p50={p50:8.1f}ms p95={p95:8.1f}ms p99={p99:8.1f}ms "
+                      f"{row['reviews_per_sec']:7.2f} rev/s {row['tokens_per_sec']:9.1f} tok/s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'corpus': {'paths': args.data_paths, 'size': len(corpus), 'tokens': tokens, 'mix': args.mix, 'seed': args.seed},
+                'env': {k: v for k, v in os.environ.items() if k.startswith(('BATCH_', 'CACHE_', 'DECODE_', 'MODEL_', 'CHUNK_'))},
+                'results': results,
+            }, f, indent=2)
+        print('Results saved at: ', args.output)
+
+
+if __name__ == '__main__':
+    main()
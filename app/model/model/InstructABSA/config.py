@@ -32,6 +32,10 @@ class Config(object):
         self.eval_accumulation_steps = 1
         self.predict_with_generate = True
         self.max_token_length = 128
+        self.eval_memory_budget_mb = None
+        self.eval_bucket_width = 32
+        self.teacher_checkpoint = None
+        self.corpus_paths = None
         self.bos_instruction = None
         self.delim_instruction = None
         self.eos_instruction = None
@@ -46,11 +50,11 @@ class Config(object):
         :return:
         """
         parser = ArgumentParser(description='training code')
-        parser.add_argument('-mode', help='train/eval/cli', type=str, required=True)
+        parser.add_argument('-mode', help='train/distill/eval/cli', type=str, required=True)
         parser.add_argument('-model_checkpoint', help='Huggingface Model Path', type=str, required=True)
         parser.add_argument('-inst_type', help='Decides if InstructABSA1 or InstructABSA2', type=int)
         parser.add_argument('-experiment_name', help='Name of experiment', type=str)
-        parser.add_argument('-task', help='ate/atsc/joint', type=str)
+        parser.add_argument('-task', help='ate/atsc/joint/aoste', type=str)
         parser.add_argument('-output_dir', type=str)
         parser.add_argument('-id_tr_data_path', type=str)
         parser.add_argument('-id_te_data_path', type=str)
@@ -70,5 +74,9 @@ class Config(object):
         parser.add_argument('-eval_accumulation_steps', help='Eval gradient accumulation steps', default=1, type=int)
         parser.add_argument('-predict_with_generate', help='Predict with generate', default=True, type=bool)
         parser.add_argument('-max_token_length', help='Sets maximum token output length', default=128, type=bool)
+        parser.add_argument('-eval_memory_budget_mb', help='Pick eval batch sizes to fit this activation memory budget (MB)', type=float)
+        parser.add_argument('-eval_bucket_width', help='Max input length spread (tokens) within an eval batch', default=32, type=int)
+        parser.add_argument('-teacher_checkpoint', help='Train on this model\'s greedy outputs instead of the gold labels (draft/student models)', type=str)
+        parser.add_argument('-corpus_paths', help='Comma separated review CSVs (raw_text) or crawler JSON files for mode=distill', type=str)
         parser.add_argument('-test_input', help='The input review to test', type=str)
         return parser
\ No newline at end of file
@@ -0,0 +1,21 @@
+import json
+from typing import List
+
+import pandas as pd
+
+
+def load_reviews(paths: List[str], text_col: str = 'raw_text') -> List[str]:
+    """
+    Read review texts from CSV files (`text_col` column, e.g. model/Dataset
+    or model/Data) and/or crawler output JSON ({"reviews": [{"review": ...}]}).
+    """
+    reviews = []
+    for path in paths:
+        if path.endswith('.json'):
+            with open(path) as f:
+                data = json.load(f)
+            items = data['reviews'] if isinstance(data, dict) else data
+            reviews.extend(item['review'] if isinstance(item, dict) else item for item in items)
+        else:
+            reviews.extend(pd.read_csv(path)[text_col].dropna().astype(str).tolist())
+    return [review.strip() for review in reviews if review.strip()]
@@ -1,5 +1,3 @@
-from datasets import Dataset
-from datasets.dataset_dict import DatasetDict
 
 
 class DatasetLoader:
@@ -139,14 +137,33 @@ class DatasetLoader:
         return df
     
     def create_data_in_aoste_format(self, df, key, label_key, text_col, aspect_col, opinion_col,
-                                         bos_instruction = '', eos_instruction = ''):
+                                         bos_instruction = '', eos_instruction = '', delim_instruction = ''):
         """
         Prepare the Data in the input format required.
         """
         label_map = {'POS':'positive', 'NEG':'negative', 'NEU':'neutral'}
         df['labels'] = df[[aspect_col, opinion_col]].apply(lambda x: ', '.join([f"{' '.join(i[key])}:{' '.join(j[key])}:{label_map[i[label_key]]}" for i, j in zip(x[0], x[1])]), axis=1)
         df.loc[df['labels'] == '', 'labels'] = 'noaspectterm:none:none'
-        df['text'] = df[text_col].apply(lambda x: bos_instruction + x + eos_instruction)
+        df['text'] = df[text_col].apply(lambda x: bos_instruction + x + delim_instruction + eos_instruction)
+        return df
+
+    def create_data_in_aoste_label_format(self, df, text_col, label_col,
+                                          bos_instruction = '', delim_instruction = '', eos_instruction = '',
+                                          unlabelled = False):
+        """
+        Prepare the Data in the input format required, from ready-made AOSTE
+        labels (aspect:opinion:polarity, comma separated), e.g. the teacher
+        labels written by mode=distill. The SemEval *_Opinion_*.json files go
+        through create_data_in_aoste_format instead. With `unlabelled` rows may
+        lack labels, for a teacher model to fill in.
+        """
+        if label_col in df.columns:
+            df['labels'] = df[label_col].fillna('').astype(str).str.strip()
+        elif unlabelled:
+            df['labels'] = ''
+        else:
+            raise Exception(f'No "{label_col}" column with AOSTE labels. Pass a *_Opinion_*.json file, or label the data with -teacher_checkpoint.')
+        df['text'] = df[text_col].apply(lambda x: bos_instruction + x + delim_instruction + eos_instruction)
         return df
 
     def create_data_in_joint_task_format(self, df, ate_key, polarity_key,
@@ -186,6 +203,10 @@ class DatasetLoader:
         """
         Create the training and test dataset as huggingface datasets format.
         """
+        # imported here so the data formatting above works without `datasets` installed
+        from datasets import Dataset
+        from datasets.dataset_dict import DatasetDict
+
         # Define train and test sets
         dataset_dict_id, dataset_dict_ood = {}, {}
 
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import shutil
+
+# Root of the local snapshot store, e.g. /app/snapshots inside the model image
+DEFAULT_SNAPSHOT_DIR = os.getenv('MODEL_SNAPSHOT_DIR')
+
+CHECKSUMS_NAME = 'checksums.json'
+CURRENT_NAME = 'current'
+SNAPSHOT_PATTERNS = ['*.json', '*.safetensors', '*.model', '*.txt']
+
+
+def _repo_dir(root, repo_id):
+    return os.path.join(root, repo_id.replace('/', '--'))
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_checksums(snapshot_path):
+    """
+    Record size and SHA-256 of every file of a snapshot.
+    """
+    checksums = {}
+    for name in sorted(os.listdir(snapshot_path)):
+        path = os.path.join(snapshot_path, name)
+        if name == CHECKSUMS_NAME or not os.path.isfile(path):
+            continue
+        checksums[name] = {'size': os.path.getsize(path), 'sha256': _sha256(path)}
+    with open(os.path.join(snapshot_path, CHECKSUMS_NAME), 'w') as f:
+        json.dump(checksums, f, indent=2)
+    return checksums
+
+
+def verify_snapshot(snapshot_path, full=False):
+    """
+    Check a snapshot against its checksums. File sizes are always compared;
+    `full=True` also re-hashes every file.
+    """
+    with open(os.path.join(snapshot_path, CHECKSUMS_NAME)) as f:
+        checksums = json.load(f)
+    for name, expected in checksums.items():
+        path = os.path.join(snapshot_path, name)
+        if not os.path.isfile(path) or os.path.getsize(path) != expected['size']:
+            raise Exception(f'Snapshot file {path} is missing or has the wrong size.')
+        if full and _sha256(path) != expected['sha256']:
+            raise Exception(f'Snapshot file {path} does not match its checksum.')
+
+
+def fetch_snapshot(repo_id, root, revision=None):
+    """
+    Download `repo_id` from the Hugging Face Hub into `root/<repo>/<commit>`,
+    convert the weights to safetensors if the repo only ships .bin files,
+    write checksums and point `root/<repo>/current` at it.
+    """
+    from huggingface_hub import HfApi, snapshot_download
+    from transformers import AutoModelForSeq2SeqLM
+
+    commit = HfApi().model_info(repo_id, revision=revision).sha
+    snapshot_path = os.path.join(_repo_dir(root, repo_id), commit)
+    if os.path.isfile(os.path.join(snapshot_path, CHECKSUMS_NAME)):
+        verify_snapshot(snapshot_path, full=True)
+    else:
+        snapshot_download(repo_id, revision=commit, local_dir=snapshot_path,
+                          allow_patterns=SNAPSHOT_PATTERNS + ['*.bin'])
+        if not any(name.endswith('.safetensors') for name in os.listdir(snapshot_path)):
+            model = AutoModelForSeq2SeqLM.from_pretrained(snapshot_path, use_safetensors=False)
+            model.save_pretrained(snapshot_path, safe_serialization=True)
+        for name in os.listdir(snapshot_path):
+            path = os.path.join(snapshot_path, name)
+            # Drop the .bin weights and the download metadata, only safetensors are served
+            if name == '.cache':
+                shutil.rmtree(path)
+            elif name.endswith('.bin'):
+                os.remove(path)
+        write_checksums(snapshot_path)
+    with open(os.path.join(_repo_dir(root, repo_id), CURRENT_NAME), 'w') as f:
+        f.write(commit)
+    return snapshot_path
+
+
+def resolve_snapshot(model_checkpoint, root=DEFAULT_SNAPSHOT_DIR):
+    """
+    Return the local snapshot directory for a Hub model id, or `model_checkpoint`
+    unchanged when it is already a local path or no snapshot has been fetched.
+    """
+    if os.path.isdir(model_checkpoint) or root is None:
+        return model_checkpoint
+    current = os.path.join(_repo_dir(root, model_checkpoint), CURRENT_NAME)
+    if not os.path.isfile(current):
+        return model_checkpoint
+    with open(current) as f:
+        snapshot_path = os.path.join(_repo_dir(root, model_checkpoint), f.read().strip())
+    verify_snapshot(snapshot_path)
+    return snapshot_path
+
+
+def weights_fingerprint(model_path):
+    """
+    Identify the weights at `model_path` without loading them: the checksums of
+    a snapshot, the name, size and modification time of every file of another
+    local model directory, or the Hub commit of a model id.
+    """
+    digest = hashlib.sha256()
+    if os.path.isdir(model_path):
+        checksums = os.path.join(model_path, CHECKSUMS_NAME)
+        if os.path.isfile(checksums):
+            with open(checksums, 'rb') as f:
+                digest.update(f.read())
+            return digest.hexdigest()
+        for dirpath, _, filenames in sorted(os.walk(model_path)):
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                stat = os.stat(path)
+                digest.update(f'{os.path.relpath(path, model_path)}\x1f{stat.st_size}\x1f{stat.st_mtime_ns}\n'.encode())
+        return digest.hexdigest()
+    from huggingface_hub import HfApi, snapshot_download
+
+    try:
+        # the Hub cache keeps each download under snapshots/<commit>
+        return os.path.basename(snapshot_download(model_path, local_files_only=True))
+    except Exception:
+        pass
+    try:
+        return HfApi().model_info(model_path).sha
+    except Exception:
+        # Unreachable or missing model: it cannot be loaded either, so nothing gets cached under this key
+        return None
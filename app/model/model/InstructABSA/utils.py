@@ -1,3 +1,5 @@
+import os
+import time
 import numpy as np
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import torch
@@ -5,17 +7,132 @@ from torch.utils.data import DataLoader
 from torch.nn.utils.rnn import pad_sequence
 from tqdm import tqdm
 from transformers import (
-    DataCollatorForSeq2Seq, AutoTokenizer, AutoModelForSeq2SeqLM,
+    DataCollatorForSeq2Seq, AutoConfig, AutoTokenizer, AutoModelForSeq2SeqLM,
     Seq2SeqTrainingArguments, Trainer, Seq2SeqTrainer
 )
+from transformers.modeling_utils import no_init_weights
+from .snapshots import resolve_snapshot
+
+
+QUANTIZED_WEIGHTS_NAME = 'quantized_state_dict.pt'
+
+
+def quantize_dynamic_int8(model, inplace = False):
+    """
+    Replace every nn.Linear of `model` by a dynamically quantized int8 version.
+    With `inplace` the layers of `model` itself are swapped instead of a copy's.
+    """
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=inplace)
+
+
+def length_bucketed_batches(lengths, batch_size, bucket_width = None, max_batch_tokens = None, fits = None):
+    """
+    Group sample indices into batches of similar length to minimise padding.
+    Indices are sorted by length; a batch is closed when it holds `batch_size`
+    samples, when, if `bucket_width` is set, the next sample is more than
+    `bucket_width` tokens longer than the shortest sample of the batch, when,
+    if `max_batch_tokens` is set, the padded batch would exceed that many tokens,
+    or when `fits(batch_size, padded_length)` rejects the grown batch.
+    """
+    batches, batch = [], []
+    for idx in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        if batch and ((batch_size and len(batch) >= batch_size) or
+                      (bucket_width and lengths[idx] - lengths[batch[0]] > bucket_width) or
+                      (max_batch_tokens and (len(batch) + 1) * lengths[idx] > max_batch_tokens) or
+                      (fits and not fits(len(batch) + 1, lengths[idx]))):
+            batches.append(batch)
+            batch = []
+        batch.append(idx)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def batch_memory_bytes(model, batch_size, seq_len, max_length = 128, num_beams = 1):
+    """
+    Rough activation memory of generating for a padded batch of `batch_size`
+    inputs of `seq_len` tokens. Counts the encoder hidden states of every layer
+    and the cross-attention keys/values kept for each decoder layer and beam
+    (linear in the input tokens), the encoder self-attention scores and their
+    softmax, batch x heads x seq_len^2 for the layer being run (which dominates
+    for long few-shot prompts), and the decoder self-attention cache of
+    `max_length` output tokens.
+    """
+    config = model.config
+    element_size = next(model.parameters()).element_size() if hasattr(model, 'parameters') else 4
+    d_model = config.d_model
+    num_heads = getattr(config, 'num_heads', 1)
+    encoder_layers = config.num_layers
+    decoder_layers = getattr(config, 'num_decoder_layers', None) or encoder_layers
+    tokens = batch_size * seq_len
+    hidden = element_size * d_model * (encoder_layers + 2 * decoder_layers * num_beams) * tokens
+    attention = element_size * 2 * num_heads * batch_size * seq_len * seq_len
+    decoder_cache = element_size * d_model * 2 * decoder_layers * num_beams * batch_size * max_length
+    return hidden + attention + decoder_cache
+
+
+def batch_fits_budget(model, memory_budget_mb, max_length = 128, num_beams = 1):
+    """
+    Predicate for length_bucketed_batches: whether a padded batch of
+    (batch_size, seq_len) fits `memory_budget_mb` of activation memory.
+    """
+    budget = memory_budget_mb * 1024 * 1024
+
+    def fits(batch_size, seq_len):
+        return batch_memory_bytes(model, batch_size, seq_len, max_length, num_beams) <= budget
+    return fits
+
+
+def padding_ratio(lengths):
+    """
+    Fraction of a right-padded batch made of padding tokens.
+    """
+    if not lengths:
+        return 0.0
+    return 1 - sum(lengths) / (max(lengths) * len(lengths))
+
+
+def load_seq2seq_model(model_checkpoint, model_path):
+    """
+    Load a seq2seq model from a local snapshot (safetensors, without a second
+    in-memory copy of the weights while loading) or, when no snapshot was
+    resolved, from `model_checkpoint` itself.
+    """
+    if model_path != model_checkpoint:
+        return AutoModelForSeq2SeqLM.from_pretrained(model_path, use_safetensors=True, low_cpu_mem_usage=True)
+    return AutoModelForSeq2SeqLM.from_pretrained(model_checkpoint, low_cpu_mem_usage=True)
 
 
 class T5Generator:
-    def __init__(self, model_checkpoint, max_new_tokens: int = 128):
-        self.tokenizer = AutoTokenizer.from_pretrained(model_checkpoint)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_checkpoint)
+    def __init__(self, model_checkpoint, max_new_tokens: int = 128, backend: str = 'torch'):
+        # Prefer the local snapshot store (MODEL_SNAPSHOT_DIR) over the Hub
+        model_path = resolve_snapshot(model_checkpoint)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        if backend == 'onnx':
+            # ONNX Runtime graphs exported by tools/export_onnx.py, CPU only
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+            self.model = ORTModelForSeq2SeqLM.from_pretrained(model_path, use_cache=True, provider='CPUExecutionProvider')
+            self.device = 'cpu'
+        elif backend == 'int8':
+            # Dynamic int8 Linear layers published by tools/quantize_model.py, CPU only.
+            # The fp32 module tree is built from the config without reading the fp32
+            # checkpoint or random-initializing it, and its Linear layers are swapped
+            # for int8 ones in place: load peaks at about the fp32 size, then the
+            # process settles at the int8 size.
+            config = AutoConfig.from_pretrained(model_path)
+            with no_init_weights():
+                model = AutoModelForSeq2SeqLM.from_config(config)
+            self.model = quantize_dynamic_int8(model, inplace=True)
+            self.model.load_state_dict(torch.load(os.path.join(model_path, QUANTIZED_WEIGHTS_NAME), map_location='cpu'))
+            self.device = 'cpu'
+        else:
+            # Tensors are copied out of the safetensors file into process memory;
+            # serve.py shares them across workers by forking after the load
+            self.model = load_seq2seq_model(model_checkpoint, model_path)
+            self.device = 'cuda' if torch.has_cuda else ('mps' if torch.has_mps else 'cpu')
+        self.backend = backend
         self.data_collator = DataCollatorForSeq2Seq(self.tokenizer)
-        self.device = 'cuda' if torch.has_cuda else ('mps' if torch.has_mps else 'cpu')
 
     def tokenize_function_inputs(self, sample):
         """
@@ -55,27 +172,82 @@ class T5Generator:
         trainer.save_model()
         return trainer
 
-    def get_labels(self, tokenized_dataset, batch_size = 4, max_length = 128, sample_set = 'train'):
+    def get_labels(self, tokenized_dataset, batch_size = 4, max_length = 128, sample_set = 'train', bucket_width = 32,
+                   memory_budget_mb = None):
         """
         Get the predictions from the trained model.
+        Samples are sorted by length and batched by length buckets with proper
+        attention masks; the predictions are returned in the original dataset
+        order. With `memory_budget_mb` the batch size is picked automatically
+        so that each padded batch fits the budget, and `batch_size` is ignored.
         """
         def collate_fn(batch):
             input_ids = [torch.tensor(example['input_ids']) for example in batch]
+            attention_mask = [torch.ones(len(ids), dtype=torch.long) for ids in input_ids]
             input_ids = pad_sequence(input_ids, batch_first=True, padding_value=self.tokenizer.pad_token_id)
-            return input_ids
-        
-        dataloader = DataLoader(tokenized_dataset[sample_set], batch_size=batch_size, collate_fn=collate_fn)
-        predicted_output = []
+            attention_mask = pad_sequence(attention_mask, batch_first=True, padding_value=0)
+            return input_ids, attention_mask
+
+        dataset = tokenized_dataset[sample_set]
+        lengths = [len(input_ids) for input_ids in dataset['input_ids']]
+        fits = None
+        if memory_budget_mb is not None:
+            fits = batch_fits_budget(self.model, memory_budget_mb, max_length)
+            batch_size = None
+        batches = length_bucketed_batches(lengths, batch_size, bucket_width, fits = fits)
+        if fits is not None:
+            print('Batches within the memory budget: ', len(batches))
+        dataloader = DataLoader(dataset, batch_sampler=batches, collate_fn=collate_fn)
+        predicted_output = [None] * len(lengths)
         self.model.to(self.device)
         print('Model loaded to: ', self.device)
 
-        for batch in tqdm(dataloader):
-            batch = batch.to(self.device)
-            output_ids = self.model.generate(batch, max_length = max_length)
+        progress = tqdm(zip(batches, dataloader), total=len(batches))
+        if hasattr(self.model, 'eval'):
+            self.model.eval()
+        for indices, (input_ids, attention_mask) in progress:
+            progress.set_postfix(batch=len(indices), padding=f'{padding_ratio([lengths[i] for i in indices]):.2f}')
+            with torch.no_grad():
+                output_ids = self.model.generate(input_ids=input_ids.to(self.device),
+                                                 attention_mask=attention_mask.to(self.device),
+                                                 max_length = max_length)
             output_texts = self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
-            for output_text in output_texts:
-                predicted_output.append(output_text)
+            for idx, output_text in zip(indices, output_texts):
+                predicted_output[idx] = output_text
         return predicted_output
+
+    def predict_texts(self, texts, batch_size = 4, max_length = 128, bucket_width = 32, memory_budget_mb = None):
+        """
+        Get the predictions for raw model inputs (instructions included), e.g. to
+        label training data with a teacher model.
+        """
+        # training-only dependency, not installed in the model service image
+        from datasets import Dataset
+        input_ids = self.tokenizer(list(texts), max_length=512, truncation=True).input_ids
+        dataset = {'texts': Dataset.from_dict({'input_ids': input_ids})}
+        predicted_output = self.get_labels(dataset, batch_size, max_length, 'texts', bucket_width, memory_budget_mb)
+        return [output_text.strip() for output_text in predicted_output]
+
+    def profile_inference(self, texts, batch_size = 4, max_length = 128):
+        """
+        Predict `texts` (instructions included) and measure the serving cost:
+        latency, throughput per CPU thread and the size of the parameters and buffers.
+        """
+        # Warm up so one-off costs are not timed
+        self.predict_texts(texts[:1], 1, max_length)
+        start = time.perf_counter()
+        predicted_output = self.predict_texts(texts, batch_size, max_length)
+        seconds = time.perf_counter() - start
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        threads = torch.get_num_threads()
+        return predicted_output, {
+            'reviews': len(texts),
+            'ms_per_review': 1000 * seconds / len(texts),
+            'reviews_per_sec': len(texts) / seconds,
+            'reviews_per_sec_per_thread': len(texts) / seconds / threads,
+            'threads': threads,
+            'weight_size_mb': sum(t.numel() * t.element_size() for t in tensors) / 2**20,
+        }
     
     def get_metrics(self, y_true, y_pred, is_triplet_extraction=False):
         total_pred = 0
@@ -130,13 +302,16 @@ class T5Generator:
 
         p = tp/total_pred
         r = tp/total_gt
-        return p, r, 2*p*r/(p+r), None
+        # no true positives: F1 is 0, not undefined
+        return p, r, 2*p*r/(p+r) if p + r else 0.0, None
 
 
 class T5Classifier:
     def __init__(self, model_checkpoint):
-        self.tokenizer = AutoTokenizer.from_pretrained(model_checkpoint, force_download = True)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_checkpoint, force_download = True)
+        # Prefer the local snapshot store (MODEL_SNAPSHOT_DIR) over the Hub
+        model_path = resolve_snapshot(model_checkpoint)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.model = load_seq2seq_model(model_checkpoint, model_path)
         self.data_collator = DataCollatorForSeq2Seq(self.tokenizer)
         self.device = 'cuda' if torch.has_cuda else ('mps' if torch.has_mps else 'cpu')
 
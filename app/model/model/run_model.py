@@ -6,11 +6,13 @@ os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 os.environ["TF_USE_LEGACY_KERAS"] = "1"
 os.environ["HF_HUB_DISABLE_XET"] = "1"
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+import json
 import warnings
 warnings.filterwarnings('ignore')
 import pandas as pd
 
 import torch
+from InstructABSA.corpus import load_reviews
 from InstructABSA.data_prep import DatasetLoader
 from InstructABSA.utils import T5Generator, T5Classifier
 from InstructABSA.config import Config
@@ -21,6 +23,21 @@ try:
 except:
     use_mps = False
 
+def read_data(path):
+    """CSV files, or the SemEval *_Opinion_*.json files (aspect and opinion spans)."""
+    return pd.read_json(path) if path.endswith('.json') else pd.read_csv(path)
+
+
+def create_data_in_aoste(loader, df, bos_instruction, unlabelled = False):
+    """AOSTE triplets from *_Opinion_*.json spans, or from a CSV `labels` column."""
+    if 'aspects' in df.columns and 'opinions' in df.columns:
+        df = loader.create_data_in_aoste_format(df, 'term', 'polarity', 'raw_words', 'aspects', 'opinions',
+                                                bos_instruction, eos_instruction, delim_instruction)
+        df['raw_text'] = df['raw_words']
+        return df
+    return loader.create_data_in_aoste_label_format(df, 'raw_text', 'labels', bos_instruction,
+                                                    delim_instruction, eos_instruction, unlabelled)
+
 # Set Global Values
 config = Config()
 instruct_handler = InstructionsHandler()
@@ -39,7 +56,15 @@ if config.mode == 'eval':
     if config.id_te_data_path is None and config.ood_te_data_path is None:
         raise Exception('Please provide testing Data path for mode=eval.')
 
-if config.experiment_name is not None and config.mode == 'train':
+if config.mode == 'distill':
+    if config.task != 'aoste':
+        raise Exception('mode=distill is only supported for task=aoste.')
+    if config.teacher_checkpoint is None or config.corpus_paths is None:
+        raise Exception('Please provide the teacher checkpoint and the review corpus paths for mode=distill.')
+    if config.id_te_data_path is None:
+        raise Exception('Please provide testing Data path for mode=distill.')
+
+if config.experiment_name is not None and config.mode in ('train', 'distill'):
     print('Experiment Name: ', config.experiment_name)
     model_checkpoint = config.model_checkpoint
     model_out_path = config.output_dir
@@ -48,7 +73,7 @@ else:
     model_checkpoint = config.model_checkpoint
     model_out_path = config.model_checkpoint
 
-print('Mode set to: ', 'training' if config.mode == 'train' else ('inference' if config.mode == 'eval' else 'Individual sample inference'))
+print('Mode set to: ', {'train': 'training', 'distill': 'distillation', 'eval': 'inference'}.get(config.mode, 'Individual sample inference'))
 
 # Load the Data
 id_tr_data_path = config.id_tr_data_path
@@ -59,14 +84,17 @@ ood_te_data_path = config.ood_te_data_path
 if config.mode != 'cli':
     id_tr_df,  id_te_df = None, None
     ood_tr_df,  ood_te_df = None, None
-    if id_tr_data_path is not None:
-        id_tr_df = pd.read_csv(id_tr_data_path)
+    if config.mode == 'distill':
+        # Unlabelled crawled reviews, labelled by the teacher below
+        id_tr_df = pd.DataFrame({'raw_text': list(dict.fromkeys(load_reviews(config.corpus_paths.split(','))))})
+    elif id_tr_data_path is not None:
+        id_tr_df = read_data(id_tr_data_path)
     if id_te_data_path is not None:
-        id_te_df = pd.read_csv(id_te_data_path)
+        id_te_df = read_data(id_te_data_path)
     if ood_tr_data_path is not None:
-        ood_tr_df = pd.read_csv(ood_tr_data_path)
+        ood_tr_df = read_data(ood_tr_data_path)
     if ood_te_data_path is not None:
-        ood_te_df = pd.read_csv(ood_te_data_path)
+        ood_te_df = read_data(ood_te_data_path)
     print('Loaded Data...')
 else:
     print('Running inference on input: ', config.test_input)
@@ -117,6 +145,13 @@ if config.task == 'joint':
     if ood_tr_data_path is not None or ood_te_data_path is not None:
         bos_instruction_ood = instruct_handler.aspe[outdomain]
     eos_instruction = instruct_handler.aspe['eos_instruct']
+if config.task == 'aoste':
+    t5_exp = T5Generator(model_checkpoint)
+    bos_instruction_id = instruct_handler.aoste[indomain]
+    if ood_tr_data_path is not None or ood_te_data_path is not None:
+        bos_instruction_ood = instruct_handler.aoste[outdomain]
+    delim_instruction = instruct_handler.aoste['delim_instruct']
+    eos_instruction = instruct_handler.aoste['eos_instruct']
 
 if config.mode != 'cli':
     # Define function to load datasets and tokenize datasets
@@ -151,6 +186,41 @@ if config.mode != 'cli':
         if loader.test_df_ood is not None:
             loader.test_df_ood = loader.create_data_in_joint_task_format(loader.test_df_ood, 'term', 'polarity', 'raw_text', 'aspectTerms', bos_instruction_ood, eos_instruction)
 
+    elif config.task == 'aoste':
+        # Training rows may be unlabelled when the teacher labels them below
+        unlabelled = config.teacher_checkpoint is not None
+        if loader.train_df_id is not None:
+            loader.train_df_id = create_data_in_aoste(loader, loader.train_df_id, bos_instruction_id, unlabelled)
+        if loader.test_df_id is not None:
+            loader.test_df_id = create_data_in_aoste(loader, loader.test_df_id, bos_instruction_id)
+        if loader.train_df_ood is not None:
+            loader.train_df_ood = create_data_in_aoste(loader, loader.train_df_ood, bos_instruction_ood, unlabelled)
+        if loader.test_df_ood is not None:
+            loader.test_df_ood = create_data_in_aoste(loader, loader.test_df_ood, bos_instruction_ood)
+
+    if config.mode == 'distill':
+        # Check the gold test set before spending time on labelling and training
+        missing = (loader.test_df_id['labels'] == '').sum()
+        if missing:
+            raise Exception(f'{missing} of {len(loader.test_df_id)} test reviews have no gold AOSTE labels; the distillation report needs a labelled test set.')
+
+    if config.mode in ('train', 'distill') and config.teacher_checkpoint is not None:
+        # Sequence-level distillation: the training targets become the teacher's
+        # greedy outputs, so e.g. a draft model for assisted decoding learns to
+        # propose exactly the tokens the teacher accepts
+        print('Labelling training data with teacher: ', config.teacher_checkpoint)
+        teacher = T5Generator(config.teacher_checkpoint)
+        for df in (loader.train_df_id, loader.train_df_ood):
+            if df is not None:
+                df['labels'] = teacher.predict_texts(df['text'], batch_size = config.per_device_eval_batch_size,
+                                                     max_length = config.max_token_length,
+                                                     bucket_width = config.eval_bucket_width,
+                                                     memory_budget_mb = config.eval_memory_budget_mb)
+        if config.mode == 'train':
+            del teacher
+        elif config.output_path is not None:
+            loader.train_df_id[['raw_text', 'labels']].to_csv(os.path.join(config.output_path, f'{config.experiment_name}_teacher_labels.csv'), index=False)
+
     # Tokenize dataset
     id_ds, id_tokenized_ds, ood_ds, ood_tokenized_ds = loader.set_data_for_training_semeval(t5_exp.tokenize_function_inputs) 
 
@@ -158,13 +228,35 @@ if config.mode != 'cli':
         # Train model
         model_trainer = t5_exp.train(id_tokenized_ds, **training_args)
         print('Model saved at: ', model_out_path)
+    elif config.mode == 'distill':
+        # Train the student on the teacher labels, then compare both on the gold test set
+        model_trainer = t5_exp.train(id_tokenized_ds, **training_args)
+        print('Student model saved at: ', model_out_path)
+        test_texts, test_labels = loader.test_df_id['text'].tolist(), loader.test_df_id['labels'].tolist()
+        report = {}
+        for name, checkpoint, generator in (('teacher', config.teacher_checkpoint, teacher), ('student', model_out_path, t5_exp)):
+            pred_labels, stats = generator.profile_inference(test_texts, batch_size = config.per_device_eval_batch_size,
+                                                             max_length = config.max_token_length)
+            precision, recall, f1, _ = generator.get_metrics(test_labels, pred_labels, is_triplet_extraction=True)
+            report[name] = dict(checkpoint = checkpoint, precision = precision, recall = recall, f1 = f1, **stats)
+        print('*****Distillation Report*****')
+        print(f"{'model':<10}{'ms/review':>12}{'reviews/s/thread':>18}{'weights (MB)':>14}{'f1':>10}")
+        for name, row in report.items():
+            print(f"{name:<10}{row['ms_per_review']:>12.1f}{row['reviews_per_sec_per_thread']:>18.2f}{row['weight_size_mb']:>14.1f}{row['f1']:>10.4f}")
+        if config.output_path is not None:
+            report_path = os.path.join(config.output_path, f'{config.experiment_name}_distill_report.json')
+            with open(report_path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print('Report saved at: ', report_path)
     elif config.mode == 'eval':
         # Get prediction labels
         print('Model loaded from: ', model_checkpoint)
         if id_tokenized_ds.get("train") is not None:
             id_tr_pred_labels = t5_exp.get_labels(tokenized_dataset = id_tokenized_ds, sample_set = 'train', 
                                                   batch_size=config.per_device_eval_batch_size, 
-                                                  max_length = config.max_token_length)
+                                                  max_length = config.max_token_length,
+                                                  bucket_width = config.eval_bucket_width,
+                                                  memory_budget_mb = config.eval_memory_budget_mb)
             id_tr_df = pd.DataFrame(id_ds['train'])[['text', 'labels']]
             id_tr_df['labels'] = id_tr_df['labels'].apply(lambda x: x.strip())
             id_tr_df['pred_labels'] = id_tr_pred_labels
@@ -179,7 +271,9 @@ if config.mode != 'cli':
         if id_tokenized_ds.get("test") is not None:
             id_te_pred_labels = t5_exp.get_labels(tokenized_dataset = id_tokenized_ds, sample_set = 'test', 
                                                   batch_size=config.per_device_eval_batch_size, 
-                                                  max_length = config.max_token_length)
+                                                  max_length = config.max_token_length,
+                                                  bucket_width = config.eval_bucket_width,
+                                                  memory_budget_mb = config.eval_memory_budget_mb)
             id_te_df = pd.DataFrame(id_ds['test'])[['text', 'labels']]
             id_te_df['labels'] = id_te_df['labels'].apply(lambda x: x.strip())
             id_te_df['pred_labels'] = id_te_pred_labels
@@ -194,7 +288,9 @@ if config.mode != 'cli':
         if ood_tokenized_ds.get("train") is not None:
             ood_tr_pred_labels = t5_exp.get_labels(tokenized_dataset = ood_tokenized_ds, sample_set = 'train', 
                                                    batch_size=config.per_device_eval_batch_size, 
-                                                   max_length = config.max_token_length)
+                                                   max_length = config.max_token_length,
+                                                   bucket_width = config.eval_bucket_width,
+                                                   memory_budget_mb = config.eval_memory_budget_mb)
             ood_tr_df = pd.DataFrame(ood_ds['train'])[['text', 'labels']]
             ood_tr_df['labels'] = ood_tr_df['labels'].apply(lambda x: x.strip())
             ood_tr_df['pred_labels'] = ood_tr_pred_labels
@@ -209,7 +305,9 @@ if config.mode != 'cli':
         if ood_tokenized_ds.get("test") is not None:
             ood_te_pred_labels = t5_exp.get_labels(tokenized_dataset = ood_tokenized_ds, sample_set = 'test', 
                                                    batch_size=config.per_device_eval_batch_size, 
-                                                   max_length = config.max_token_length)
+                                                   max_length = config.max_token_length,
+                                                   bucket_width = config.eval_bucket_width,
+                                                   memory_budget_mb = config.eval_memory_budget_mb)
             ood_te_df = pd.DataFrame(ood_ds['test'])[['text', 'labels']]
             ood_te_df['labels'] = ood_te_df['labels'].apply(lambda x: x.strip())
             ood_te_df['pred_labels'] = ood_te_pred_labels
@@ -0,0 +1,93 @@
+"""
+Pre-fork serving mode for the model service.
+
+The master process loads the model once, then forks `-workers` processes that
+share its weights copy-on-write. Each worker is pinned to its own slice of the
+CPU cores, sizes torch's intra-op thread pool to that slice and serves
+app.py on a local port. The master runs a small router on `-port` that
+spreads requests over the workers.
+
+Usage (from app/model):
+    python serve.py -workers 4 -port 8000
+"""
+import gc
+import os
+import signal
+from argparse import ArgumentParser
+
+import uvicorn
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Pre-fork multi-worker model server')
+    parser.add_argument('-workers', help='Number of worker processes', default=int(os.getenv('MODEL_WORKERS', '2')), type=int)
+    parser.add_argument('-host', default='0.0.0.0', type=str)
+    parser.add_argument('-port', help='Port of the router', default=8000, type=int)
+    parser.add_argument('-worker_port', help='First local port used by the workers', default=8100, type=int)
+    return parser
+
+
+def split_cores(cores, workers):
+    """Split `cores` into `workers` contiguous, nearly equal groups."""
+    size, extra = divmod(len(cores), workers)
+    groups, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(cores[start:end] or cores)
+        start = end
+    return groups
+
+
+def run_worker(model_app, cores, port):
+    import torch
+
+    os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # interop pool already started in the master
+        pass
+    print(f'Worker {os.getpid()} on cores {cores} serving port {port}')
+    uvicorn.run(model_app.app, host='127.0.0.1', port=port, log_level='warning')
+
+
+def main():
+    args = setup_parser().parse_args()
+
+    import app as model_app
+    from service.router import WorkerRouter
+
+    # Load the weights once; forked workers share these pages copy-on-write
+    model_app.load_model()
+    if model_app.DRAFT_MODEL_CHECKPOINT is not None:
+        model_app.load_draft_model()
+    # Move every object to the permanent generation so the workers' garbage
+    # collector does not write to (and so copy) the pages shared with the master
+    gc.collect()
+    gc.freeze()
+
+    cores = sorted(os.sched_getaffinity(0))
+    groups = split_cores(cores, max(1, args.workers))
+    pids = []
+    for i, group in enumerate(groups):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(model_app, group, args.worker_port + i)
+            os._exit(0)
+        pids.append(pid)
+
+    router = WorkerRouter([f'http://127.0.0.1:{args.worker_port + i}' for i in range(len(groups))])
+    try:
+        uvicorn.run(router.app(), host=args.host, port=args.port)
+    finally:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except ProcessLookupError:
+                pass
+
+
+if __name__ == '__main__':
+    main()
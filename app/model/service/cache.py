@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-crawled copies of the same review share a key."""
+    return " ".join(text.split())
+
+
+class PredictionCache:
+    """
+    Content-addressed cache for model predictions.
+
+    Keys are a SHA-256 of the normalized review text plus a namespace that
+    identifies the model checkpoint and instruction set, so changing either one
+    never serves stale predictions. Values live in an in-memory LRU tier and,
+    when `db_path` is given, in a SQLite tier that survives restarts.
+    """
+
+    def __init__(self, namespace: str, max_size: int = 4096, db_path: Optional[str] = None):
+        self.namespace = hashlib.sha256(namespace.encode("utf-8")).hexdigest()
+        self.max_size = max_size
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.db_path = db_path
+        self._db = None
+        self._db_pid = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # SQLite connections must not cross fork(), so each process opens its own
+        if self.db_path is None:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("create table if not exists predictions (key text primary key, value text not null)")
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def key(self, text: str, *extra: str) -> str:
+        payload = "\x1f".join((self.namespace, normalize_text(text)) + extra)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+            db = self._connection()
+            if db is not None:
+                row = db.execute("select value from predictions where key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._remember(key, value)
+            db = self._connection()
+            if db is not None:
+                db.execute(
+                    "insert or replace into predictions (key, value) values (?, ?)",
+                    (key, json.dumps(value))
+                )
+                db.commit()
+
+    def _remember(self, key: str, value: Any):
+        if self.max_size <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_size": len(self._memory),
+                "memory_max_size": self.max_size,
+                "disk_enabled": self.db_path is not None,
+            }
@@ -0,0 +1,50 @@
+import re
+from typing import List, Tuple
+
+# Same sentence split the /predict response grouping uses
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s*')
+
+NO_ASPECT = "noaspectterm:none:none"
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_RE.split(text) if s.strip()]
+
+
+def pack_windows(sentences: List[str], lengths: List[int], budget: int) -> List[str]:
+    """
+    Greedily pack consecutive sentences into windows of at most `budget` tokens.
+
+    A sentence longer than the budget gets a window of its own and is truncated
+    by the prompt encoder.
+    """
+    windows: List[str] = []
+    current: List[str] = []
+    used = 0
+    for sentence, length in zip(sentences, lengths):
+        if current and used + length > budget:
+            windows.append(" ".join(current))
+            current, used = [], 0
+        current.append(sentence)
+        used += length
+    if current:
+        windows.append(" ".join(current))
+    return windows
+
+
+def merge_outputs(outputs: List[Tuple[str, List[Tuple[str, str, str]]]]) -> Tuple[str, List[Tuple[str, str, str]]]:
+    """
+    Merge the (raw_output, triplets) of every window of one review.
+
+    Triplets are deduplicated in order, and the no-aspect marker is dropped as
+    soon as any window found a real aspect.
+    """
+    raw_parts = [raw for raw, _ in outputs if raw and raw != NO_ASPECT]
+    triplets: List[Tuple[str, str, str]] = []
+    for _, window_triplets in outputs:
+        for triplet in window_triplets:
+            if triplet not in triplets and ":".join(triplet) != NO_ASPECT:
+                triplets.append(triplet)
+    if not raw_parts:
+        return outputs[0] if outputs else ("", [])
+    return ", ".join(raw_parts), triplets
@@ -0,0 +1,46 @@
+from typing import List, Set
+
+import torch
+from transformers import LogitsProcessor
+
+# Everything an AOSTE output may contain besides words copied from the review:
+# the delimiters, the polarity labels and the no-aspect answer
+OUTPUT_VOCABULARY = "noaspectterm:none:none, :positive, :negative, :neutral"
+
+
+def review_token_ids(tokenizer, text: str) -> Set[int]:
+    """
+    Token ids a copied span of `text` can decode to: the review as written,
+    lower-cased, and with its words glued to a preceding ':' (opinion terms
+    follow the aspect without a space, so they tokenize differently).
+    """
+    words = text.split()
+    variants = [text, text.lower(), ":".join(words), ":".join(words).lower()]
+    ids: Set[int] = set()
+    for input_ids in tokenizer(variants, add_special_tokens=False).input_ids:
+        ids.update(input_ids)
+    return ids
+
+
+class InputVocabularyLogitsProcessor(LogitsProcessor):
+    """
+    Restrict every decoding step to the tokens of the input review plus the
+    AOSTE delimiters, polarity labels and end/pad tokens. One set of allowed
+    ids per input; beam search rows are mapped back to their input.
+    """
+
+    def __init__(self, tokenizer, texts: List[str]):
+        base = set(tokenizer(OUTPUT_VOCABULARY, add_special_tokens=False).input_ids)
+        base.update(i for i in (tokenizer.eos_token_id, tokenizer.pad_token_id) if i is not None)
+        self.allowed = [sorted(base | review_token_ids(tokenizer, text)) for text in texts]
+        self._blocked = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        if self._blocked is None or self._blocked.shape[1] != scores.shape[-1]:
+            blocked = torch.ones(len(self.allowed), scores.shape[-1], dtype=torch.bool)
+            for row, ids in enumerate(self.allowed):
+                blocked[row, ids] = False
+            self._blocked = blocked.to(scores.device)
+        # generate() flattens (batch, num_beams) into consecutive rows
+        blocked = self._blocked.repeat_interleave(scores.shape[0] // len(self.allowed), dim=0)
+        return scores.masked_fill(blocked, float("-inf"))
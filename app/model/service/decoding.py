@@ -0,0 +1,34 @@
+from typing import Any, Dict
+
+# Named generate() settings. Every profile returns a single sequence per input,
+# since only the best hypothesis is ever decoded.
+DECODE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "greedy": {
+        "num_beams": 1,
+        "do_sample": False,
+    },
+    "beam-2": {
+        "num_beams": 2,
+        "early_stopping": True,
+    },
+    "beam-4": {
+        "num_beams": 4,
+        "early_stopping": True,
+    },
+    "assisted": {
+        "num_beams": 1,
+        "do_sample": False,
+    },
+}
+
+# Profiles decoded with a draft model proposing tokens that the main model
+# verifies (assisted generation). The output is the main model's greedy output;
+# generate() only supports this one sequence at a time.
+ASSISTED_PROFILES = ("assisted",)
+
+
+def get_decode_kwargs(profile: str) -> Dict[str, Any]:
+    """Return the generate() kwargs of a named decode profile."""
+    if profile not in DECODE_PROFILES:
+        raise ValueError(f"Unknown decode profile '{profile}'. Choose one of: {', '.join(DECODE_PROFILES)}")
+    return dict(DECODE_PROFILES[profile], num_return_sequences=1)
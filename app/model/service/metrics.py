@@ -0,0 +1,41 @@
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+
+STAGE_SECONDS = Histogram(
+    "absa_stage_seconds",
+    "Time spent per inference stage and model batch",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+INPUT_TOKENS = Counter("absa_input_tokens", "Prompt tokens sent to the model, padding excluded")
+OUTPUT_TOKENS = Counter("absa_output_tokens", "Tokens generated by the model, padding excluded")
+BATCH_SIZE = Gauge("absa_batch_size", "Number of prompts in the last model batch")
+PADDING_RATIO = Histogram(
+    "absa_batch_padding_ratio",
+    "Fraction of padding tokens per model batch",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1),
+)
+QUEUE_DEPTH = Gauge("absa_queue_depth", "Requests waiting in the micro-batcher queue")
+PREFILTER_REVIEWS = Counter("absa_prefilter_reviews", "Reviews seen by the no-aspect pre-filter by outcome", ["outcome"])
+STARTUP_SECONDS = Gauge("absa_startup_seconds", "Time taken to load and warm up the model")
+
+
+class CacheCollector:
+    """Expose PredictionCache counters at scrape time."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def collect(self):
+        stats = self.cache.stats()
+        lookups = CounterMetricFamily("absa_cache_lookups", "Prediction cache lookups by result", labels=["result"])
+        lookups.add_metric(["memory_hit"], stats["memory_hits"])
+        lookups.add_metric(["disk_hit"], stats["disk_hits"])
+        lookups.add_metric(["miss"], stats["misses"])
+        yield lookups
+        yield GaugeMetricFamily("absa_cache_hit_rate", "Share of cache lookups served from the cache", value=stats["hit_rate"])
+        yield GaugeMetricFamily("absa_cache_memory_size", "Entries in the in-memory cache tier", value=stats["memory_size"])
+
+
+def register_cache(cache):
+    REGISTRY.register(CacheCollector(cache))
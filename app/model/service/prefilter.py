@@ -0,0 +1,60 @@
+import ast
+from typing import List
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+
+NO_ASPECT_TERM = "noaspectterm"
+NO_ASPECT_OUTPUT = "noaspectterm:none:none"
+
+
+def is_aspect_free(aspect_terms=None, labels=None) -> bool:
+    """
+    Whether a dataset row has no aspect, from either a SemEval `aspectTerms`
+    cell ("[{'term': 'noaspectterm', 'polarity': 'none'}]") or an AOSTE
+    `labels` cell ("noaspectterm:none:none").
+    """
+    if labels is not None:
+        return all(part.strip().split(":")[0] == NO_ASPECT_TERM for part in labels.split(",") if part.strip())
+    terms = ast.literal_eval(aspect_terms) if isinstance(aspect_terms, str) else aspect_terms
+    return all(term["term"] == NO_ASPECT_TERM for term in terms or [])
+
+
+class NoAspectPrefilter:
+    """
+    Linear classifier on hashed word and character n-grams that predicts whether
+    a review has no extractable aspect. Reviews scored at or above `threshold`
+    skip the T5 generation and get the model's no-aspect output directly.
+    """
+
+    def __init__(self, threshold: float = 0.95):
+        self.threshold = threshold
+        self.word_vectorizer = HashingVectorizer(ngram_range=(1, 2), n_features=2 ** 18, alternate_sign=False)
+        self.char_vectorizer = HashingVectorizer(analyzer="char_wb", ngram_range=(2, 4), n_features=2 ** 18, alternate_sign=False)
+        self.classifier = LogisticRegression(max_iter=1000, class_weight="balanced")
+
+    def _features(self, texts: List[str]):
+        from scipy.sparse import hstack
+        return hstack([self.word_vectorizer.transform(texts), self.char_vectorizer.transform(texts)]).tocsr()
+
+    def fit(self, texts: List[str], aspect_free: List[bool]) -> "NoAspectPrefilter":
+        self.classifier.fit(self._features(texts), np.array(aspect_free, dtype=int))
+        return self
+
+    def scores(self, texts: List[str]) -> np.ndarray:
+        """Probability that each review is aspect-free."""
+        return self.classifier.predict_proba(self._features(texts))[:, 1]
+
+    def skip_mask(self, texts: List[str]) -> List[bool]:
+        if not texts:
+            return []
+        return (self.scores(texts) >= self.threshold).tolist()
+
+    def save(self, path: str):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str) -> "NoAspectPrefilter":
+        return joblib.load(path)
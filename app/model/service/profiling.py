@@ -0,0 +1,65 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StageProfiler:
+    """
+    Accumulate wall-clock time per pipeline stage (tokenize, generate, ...).
+
+    Each measurement also records how many requests it covered, so batched
+    stages can still be reported as time per request. Measurements are also
+    forwarded to the optional Prometheus histograms.
+    """
+
+    def __init__(self, stage_histogram=None, padding_histogram=None):
+        self.stage_histogram = stage_histogram
+        self.padding_histogram = padding_histogram
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, float] = {}
+        self._requests: Dict[str, int] = {}
+        self._padding_batches = 0
+        self._padding_ratio_sum = 0.0
+        self._last_padding_ratio = 0.0
+
+    @contextmanager
+    def time(self, stage: str, requests: int = 1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.stage_histogram is not None:
+                self.stage_histogram.labels(stage).observe(elapsed)
+            with self._lock:
+                self._seconds[stage] = self._seconds.get(stage, 0.0) + elapsed
+                self._requests[stage] = self._requests.get(stage, 0) + requests
+
+    def observe_padding(self, ratio: float):
+        """Record the fraction of padding tokens of one model batch."""
+        if self.padding_histogram is not None:
+            self.padding_histogram.observe(ratio)
+        with self._lock:
+            self._padding_batches += 1
+            self._padding_ratio_sum += ratio
+            self._last_padding_ratio = ratio
+
+    def padding(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "batches": self._padding_batches,
+                "mean_ratio": self._padding_ratio_sum / self._padding_batches if self._padding_batches else 0.0,
+                "last_ratio": self._last_padding_ratio,
+            }
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {
+                    "total_seconds": seconds,
+                    "requests": self._requests[stage],
+                    "ms_per_request": 1000 * seconds / self._requests[stage] if self._requests[stage] else 0.0,
+                }
+                for stage, seconds in self._seconds.items()
+            }
@@ -0,0 +1,60 @@
+from typing import List
+
+import torch
+from transformers import BatchEncoding
+
+
+class PromptEncoder:
+    """
+    Build `bos + text + delim + eos` prompts from pre-tokenized pieces.
+
+    The instruction prefix (the long few-shot `bos` text) and the suffix
+    (`delim + eos` plus the tokenizer's EOS token) are tokenized once; each
+    request only tokenizes its review text and concatenates token ids. When the
+    prompt does not fit in `max_length`, the review text is truncated so the
+    suffix, which tells the model to start answering, is always kept.
+    """
+
+    def __init__(self, tokenizer, bos_instruction: str, delim_instruction: str, eos_instruction: str, max_length: int = None):
+        self.tokenizer = tokenizer
+        self.max_length = max_length or tokenizer.model_max_length
+        # The prefix ends with "input: "; review text tokenized on its own starts with
+        # a word-boundary marker, which stands in for that trailing space
+        self.prefix_ids = tokenizer(bos_instruction.rstrip(), add_special_tokens=False)["input_ids"]
+        self.suffix_ids = self._continuation_ids(f"{delim_instruction}{eos_instruction}")
+        if tokenizer.eos_token_id is not None:
+            self.suffix_ids.append(tokenizer.eos_token_id)
+        self.text_budget = self.max_length - len(self.prefix_ids) - len(self.suffix_ids)
+        if self.text_budget <= 0:
+            raise ValueError(f"Instruction prefix and suffix take {len(self.prefix_ids) + len(self.suffix_ids)} tokens, "
+                             f"more than max_length={self.max_length}")
+
+    def _continuation_ids(self, text: str) -> List[int]:
+        # Tokenize `text` as it appears right after other text, i.e. without the
+        # word-boundary marker the tokenizer adds at the start of a string
+        anchor = self.tokenizer("a", add_special_tokens=False)["input_ids"]
+        ids = self.tokenizer(f"a{text}", add_special_tokens=False)["input_ids"]
+        if ids[:len(anchor)] == anchor:
+            return ids[len(anchor):]
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    def text_ids(self, texts: List[str]) -> List[List[int]]:
+        return self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+
+    def build(self, text_ids: List[int]) -> List[int]:
+        return self.prefix_ids + text_ids[:self.text_budget] + self.suffix_ids
+
+    def encode(self, texts: List[str]) -> BatchEncoding:
+        """Right-padded `input_ids` and `attention_mask` tensors for a batch of review texts."""
+        sequences = [self.build(ids) for ids in self.text_ids(texts)]
+        return self.pad(sequences)
+
+    def pad(self, sequences: List[List[int]]) -> BatchEncoding:
+        width = max(len(seq) for seq in sequences)
+        pad_id = self.tokenizer.pad_token_id
+        input_ids = torch.full((len(sequences), width), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(sequences), width), dtype=torch.long)
+        for i, seq in enumerate(sequences):
+            input_ids[i, :len(seq)] = torch.tensor(seq, dtype=torch.long)
+            attention_mask[i, :len(seq)] = 1
+        return BatchEncoding({"input_ids": input_ids, "attention_mask": attention_mask})
@@ -0,0 +1,141 @@
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import List
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from prometheus_client.metrics_core import Metric
+from prometheus_client.parser import text_string_to_metric_families
+from prometheus_client.samples import Sample
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "upgrade", "host"}
+SUMMED_TYPES = {"counter", "histogram", "summary"}
+
+
+class _StaticCollector:
+    def __init__(self, families):
+        self.families = families
+
+    def collect(self):
+        return self.families
+
+
+def merge_metrics(texts: List[str]) -> bytes:
+    """
+    Merge the Prometheus exposition of every worker into one.
+
+    Counter, histogram and summary samples are summed across workers; gauges
+    keep one series per worker, labelled `worker`. The per-worker `_created`
+    timestamps are dropped, as they have no meaning for summed series.
+    """
+    families = {}
+    sums = {}
+    for worker, text in enumerate(texts):
+        for family in text_string_to_metric_families(text):
+            if family.name.endswith("_created"):
+                continue
+            merged = families.setdefault(family.name, Metric(family.name, family.documentation, family.type, family.unit))
+            for sample in family.samples:
+                if family.type not in SUMMED_TYPES:
+                    merged.samples.append(Sample(sample.name, dict(sample.labels, worker=str(worker)), sample.value))
+                    continue
+                key = (family.name, sample.name, tuple(sorted(sample.labels.items())))
+                sums[key] = sums.get(key, 0.0) + sample.value
+    for (family_name, name, labels), value in sums.items():
+        families[family_name].samples.append(Sample(name, dict(labels), value))
+    registry = CollectorRegistry()
+    registry.register(_StaticCollector(list(families.values())))
+    return generate_latest(registry)
+
+
+class WorkerRouter:
+    """
+    Small reverse proxy that spreads requests over local worker processes.
+
+    Each request goes to the worker with the fewest requests in flight; ties are
+    broken round-robin. Response bodies are streamed through unchanged, so
+    /predict_stream keeps working behind the router.
+    """
+
+    def __init__(self, worker_urls: List[str]):
+        self.worker_urls = worker_urls
+        self.in_flight = [0] * len(worker_urls)
+        self._turn = itertools.count()
+        self._client = None
+
+    def pick(self) -> int:
+        start = next(self._turn) % len(self.worker_urls)
+        order = [(start + i) % len(self.worker_urls) for i in range(len(self.worker_urls))]
+        return min(order, key=lambda i: self.in_flight[i])
+
+    async def proxy(self, request: Request):
+        worker = self.pick()
+        self.in_flight[worker] += 1
+        try:
+            upstream = self._client.build_request(
+                request.method,
+                self.worker_urls[worker] + request.url.path,
+                params=request.query_params,
+                headers=[(k, v) for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS],
+                content=await request.body(),
+            )
+            response = await self._client.send(upstream, stream=True)
+        except Exception:
+            self.in_flight[worker] -= 1
+            raise
+
+        async def body():
+            try:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+            finally:
+                await response.aclose()
+                self.in_flight[worker] -= 1
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+        return StreamingResponse(body(), status_code=response.status_code, headers=headers)
+
+    async def metrics(self, request: Request):
+        # Each worker has its own registry: scrape them all and merge, so
+        # counters and histograms cover the whole server
+        async def worker_metrics(url):
+            try:
+                response = await self._client.get(f"{url}/metrics", timeout=5)
+                return response.text if response.status_code == 200 else None
+            except httpx.HTTPError:
+                return None
+
+        texts = await asyncio.gather(*(worker_metrics(url) for url in self.worker_urls))
+        return Response(merge_metrics([text for text in texts if text is not None]), media_type=CONTENT_TYPE_LATEST)
+
+    async def ready(self, request: Request):
+        async def worker_ready(url):
+            try:
+                return (await self._client.get(f"{url}/ready", timeout=2)).status_code == 200
+            except httpx.HTTPError:
+                return False
+
+        states = await asyncio.gather(*(worker_ready(url) for url in self.worker_urls))
+        body = {"ready": all(states), "workers": [{"url": url, "ready": state} for url, state in zip(self.worker_urls, states)]}
+        return JSONResponse(body, status_code=200 if all(states) else 503)
+
+    def app(self) -> Starlette:
+        @asynccontextmanager
+        async def lifespan(app):
+            self._client = httpx.AsyncClient(timeout=None)
+            yield
+            await self._client.aclose()
+
+        return Starlette(
+            routes=[
+                Route("/ready", self.ready, methods=["GET"]),
+                Route("/metrics", self.metrics, methods=["GET"]),
+                Route("/{path:path}", self.proxy, methods=["GET", "POST"]),
+            ],
+            lifespan=lifespan,
+        )
@@ -0,0 +1,65 @@
+"""
+Check that the ONNX Runtime backend produces the same triplets as eager PyTorch.
+
+Usage (from app/model):
+    python tools/check_backends.py -onnx_dir onnx_model -data_path <path_to_csv>
+
+Exits with a non-zero status when any review decodes differently.
+"""
+import os
+import sys
+from argparse import ArgumentParser
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, os.pardir)))
+
+import app as model_app
+from model.InstructABSA.utils import T5Generator
+from benchmark.eval_set import load_eval_set, predict_texts
+
+SAMPLE_REVIEWS = [
+    "Very good plot with an unexpected ending",
+    "The acting was wooden and the dialogue painfully slow, but the soundtrack is gorgeous.",
+    "I watched it twice.",
+]
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Compare torch and ONNX Runtime outputs')
+    parser.add_argument('-onnx_dir', help='Directory written by tools/export_onnx.py', default='onnx_model', type=str)
+    parser.add_argument('-data_path', help='Optional CSV with review texts', type=str)
+    parser.add_argument('-text_col', default='raw_text', type=str)
+    parser.add_argument('-label_col', default='labels', type=str)
+    parser.add_argument('-limit', help='Only use the first N rows', default=100, type=int)
+    parser.add_argument('-decode_profile', default=model_app.DECODE_PROFILE, type=str)
+    return parser
+
+
+def main():
+    args = setup_parser().parse_args()
+    texts = SAMPLE_REVIEWS
+    if args.data_path is not None:
+        texts, _ = load_eval_set(args.data_path, args.text_col, args.label_col, args.limit)
+    decode_kwargs = model_app.get_decode_kwargs(args.decode_profile)
+
+    torch_generator = T5Generator(model_app.model_checkpoint)
+    torch_generator.model.eval()
+    onnx_generator = T5Generator(args.onnx_dir, backend='onnx')
+
+    instructions = (model_app.bos, model_app.delim, model_app.eos)
+    torch_outputs = [model_app.parse_triplets(pred) for pred in predict_texts(torch_generator, texts, *instructions, decode_kwargs)]
+    onnx_outputs = [model_app.parse_triplets(pred) for pred in predict_texts(onnx_generator, texts, *instructions, decode_kwargs)]
+
+    mismatches = 0
+    for text, expected, actual in zip(texts, torch_outputs, onnx_outputs):
+        if expected != actual:
+            mismatches += 1
+            print('MISMATCH:', text)
+            print('  torch:', expected)
+            print('  onnx: ', actual)
+    print(f'{len(texts) - mismatches}/{len(texts)} reviews decoded identically')
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
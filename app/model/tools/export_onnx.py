@@ -0,0 +1,32 @@
+"""
+Export the AOSTE checkpoint to ONNX encoder / decoder / decoder-with-past graphs.
+
+Usage (from app/model):
+    pip install -r requirements-onnx.txt
+    python tools/export_onnx.py -output_dir onnx_model
+"""
+from argparse import ArgumentParser
+
+from optimum.onnxruntime import ORTModelForSeq2SeqLM
+from transformers import AutoTokenizer
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Export the T5 AOSTE model to ONNX')
+    parser.add_argument('-model_checkpoint', help='Huggingface Model Path', default='PhatLe12344/AOSTE_InstructABSA', type=str)
+    parser.add_argument('-output_dir', help='Where to write the ONNX graphs and tokenizer', default='onnx_model', type=str)
+    return parser
+
+
+def main():
+    args = setup_parser().parse_args()
+    # use_cache=True also exports the decoder-with-past graph so decoding reuses the KV cache
+    model = ORTModelForSeq2SeqLM.from_pretrained(args.model_checkpoint, export=True, use_cache=True)
+    tokenizer = AutoTokenizer.from_pretrained(args.model_checkpoint)
+    model.save_pretrained(args.output_dir)
+    tokenizer.save_pretrained(args.output_dir)
+    print('ONNX model saved at: ', args.output_dir)
+
+
+if __name__ == '__main__':
+    main()
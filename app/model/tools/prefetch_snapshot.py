@@ -0,0 +1,48 @@
+"""
+Pre-fetch model snapshots into the local snapshot store.
+
+Usage (from app/model):
+    python tools/prefetch_snapshot.py -snapshot_dir snapshots
+    python tools/prefetch_snapshot.py -snapshot_dir snapshots -verify
+
+Snapshots are stored as <snapshot_dir>/<repo>/<commit>/ with safetensors
+weights and a checksums.json; <snapshot_dir>/<repo>/current names the commit
+that T5Generator / T5Classifier load when MODEL_SNAPSHOT_DIR points at
+<snapshot_dir>.
+"""
+import os
+import sys
+from argparse import ArgumentParser
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, os.pardir)))
+
+from model.InstructABSA.snapshots import fetch_snapshot, resolve_snapshot, verify_snapshot
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Pre-fetch model snapshots')
+    parser.add_argument('-model_checkpoint', help='Huggingface Model Path(s), comma separated',
+                        default='PhatLe12344/AOSTE_InstructABSA', type=str)
+    parser.add_argument('-revision', help='Branch, tag or commit to fetch', type=str)
+    parser.add_argument('-snapshot_dir', help='Root of the snapshot store', default='snapshots', type=str)
+    parser.add_argument('-verify', help='Only re-hash the current snapshots', action='store_true')
+    return parser
+
+
+def main():
+    args = setup_parser().parse_args()
+    for model_checkpoint in args.model_checkpoint.split(','):
+        if args.verify:
+            snapshot_path = resolve_snapshot(model_checkpoint, args.snapshot_dir)
+            if snapshot_path == model_checkpoint:
+                raise Exception(f'No snapshot of {model_checkpoint} in {args.snapshot_dir}')
+            verify_snapshot(snapshot_path, full=True)
+            print('Snapshot verified: ', snapshot_path)
+        else:
+            snapshot_path = fetch_snapshot(model_checkpoint, args.snapshot_dir, args.revision)
+            print('Snapshot saved at: ', snapshot_path)
+
+
+if __name__ == '__main__':
+    main()
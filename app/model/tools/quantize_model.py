@@ -0,0 +1,88 @@
+"""
+Quantize the AOSTE checkpoint to dynamic int8 and publish it only if F1 holds up.
+
+Usage (from app/model):
+    python tools/quantize_model.py -data_path ../../model/Dataset/SemEval16/Test/Restaurants_Opinion_Test.json -output_dir quantized_model -max_f1_drop 0.01
+
+The fp32 and int8 models are both evaluated with
+T5Generator.get_metrics(..., is_triplet_extraction=True). When the int8 F1 is
+more than `max_f1_drop` below the fp32 F1 nothing is written and the script
+exits with a non-zero status.
+"""
+import copy
+import json
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, os.pardir)))
+
+import app as model_app
+import torch
+from model.InstructABSA.utils import T5Generator, QUANTIZED_WEIGHTS_NAME, quantize_dynamic_int8
+from benchmark.eval_set import load_eval_set, predict_texts, triplet_metrics
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Quantize the T5 AOSTE model to int8 with an accuracy gate')
+    parser.add_argument('-model_checkpoint', help='Huggingface Model Path', default=model_app.model_checkpoint, type=str)
+    parser.add_argument('-data_path', help='SemEval *_Opinion_*.json test file, or CSV with review texts and AOSTE labels', type=str, required=True)
+    parser.add_argument('-text_col', default='raw_text', type=str)
+    parser.add_argument('-label_col', default='labels', type=str)
+    parser.add_argument('-limit', help='Only use the first N rows', type=int)
+    parser.add_argument('-decode_profile', default=model_app.DECODE_PROFILE, type=str)
+    parser.add_argument('-batch_size', default=8, type=int)
+    parser.add_argument('-max_f1_drop', help='Largest allowed absolute F1 drop', default=0.01, type=float)
+    parser.add_argument('-output_dir', help='Where to publish the quantized model', default='quantized_model', type=str)
+    return parser
+
+
+def evaluate(generator, texts, labels, args):
+    start = time.perf_counter()
+    preds = predict_texts(generator, texts, model_app.bos, model_app.delim, model_app.eos,
+                          model_app.get_decode_kwargs(args.decode_profile), args.batch_size)
+    latency_ms = 1000 * (time.perf_counter() - start) / len(texts)
+    precision, recall, f1 = triplet_metrics(generator, labels, preds)
+    return {'precision': precision, 'recall': recall, 'f1': f1, 'ms_per_review': latency_ms}
+
+
+def main():
+    args = setup_parser().parse_args()
+    texts, labels = load_eval_set(args.data_path, args.text_col, args.label_col, args.limit)
+
+    fp32 = T5Generator(args.model_checkpoint)
+    fp32.model.eval()
+    fp32.model.to('cpu')
+    fp32_metrics = evaluate(fp32, texts, labels, args)
+    print('fp32:', fp32_metrics)
+
+    int8 = copy.copy(fp32)
+    int8.model = quantize_dynamic_int8(copy.deepcopy(fp32.model))
+    int8_metrics = evaluate(int8, texts, labels, args)
+    print('int8:', int8_metrics)
+
+    f1_drop = fp32_metrics['f1'] - int8_metrics['f1']
+    print(f'F1 drop: {f1_drop:.4f} (allowed: {args.max_f1_drop:.4f})')
+    if f1_drop > args.max_f1_drop:
+        print('Refusing to publish the quantized model.')
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    torch.save(int8.model.state_dict(), os.path.join(args.output_dir, QUANTIZED_WEIGHTS_NAME))
+    fp32.model.config.save_pretrained(args.output_dir)
+    fp32.tokenizer.save_pretrained(args.output_dir)
+    with open(os.path.join(args.output_dir, 'quantization.json'), 'w') as f:
+        json.dump({
+            'model_checkpoint': args.model_checkpoint,
+            'data_path': args.data_path,
+            'decode_profile': args.decode_profile,
+            'fp32': fp32_metrics,
+            'int8': int8_metrics,
+        }, f, indent=2)
+    print('Quantized model saved at: ', args.output_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Train the "no-aspect" pre-filter and report its skip rate and lost recall.
+
+Usage (from app/model):
+    python tools/train_prefilter.py \\
+        -train_paths ../../model/Dataset/SemEval14/Train/Restaurants_Train.csv,../../model/Dataset/SemEval16/Train/Restaurants_Train.csv \\
+        -eval_path ../../model/Dataset/SemEval16/Test/Restaurants_Test.csv \\
+        -max_recall_loss 0.01 -output prefilter.joblib
+
+Rows are labelled aspect-free from their `aspectTerms` (SemEval format) or
+`labels` (AOSTE format) column. A stratified -tune_fraction of the training
+rows is held out of fitting; the threshold is the lowest one whose lost recall
+on that held-out part, i.e. the share of aspect-bearing reviews that would be
+skipped, stays within -max_recall_loss. The eval set is only used to report
+the skip rate and lost recall at that threshold.
+"""
+import os
+import sys
+from argparse import ArgumentParser
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, os.pardir)))
+
+import numpy as np
+import pandas as pd
+
+from service.prefilter import NoAspectPrefilter, is_aspect_free
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Train the no-aspect pre-filter')
+    parser.add_argument('-train_paths', help='Comma separated training CSVs', required=True, type=str)
+    parser.add_argument('-eval_path', help='Evaluation CSV', required=True, type=str)
+    parser.add_argument('-text_col', default='raw_text', type=str)
+    parser.add_argument('-tune_fraction', help='Share of the training rows held out to pick the threshold', default=0.2, type=float)
+    parser.add_argument('-seed', default=42, type=int)
+    parser.add_argument('-max_recall_loss', help='Largest allowed share of aspect-bearing reviews skipped', default=0.01, type=float)
+    parser.add_argument('-output', help='Where to save the pre-filter', default='prefilter.joblib', type=str)
+    return parser
+
+
+def load_rows(paths, text_col):
+    texts, aspect_free = [], []
+    for path in paths:
+        df = pd.read_csv(path)
+        label_col = 'labels' if 'labels' in df.columns else 'aspectTerms'
+        df = df[[text_col, label_col]].dropna()
+        texts.extend(df[text_col].astype(str).tolist())
+        if label_col == 'labels':
+            aspect_free.extend(is_aspect_free(labels=labels) for labels in df[label_col])
+        else:
+            aspect_free.extend(is_aspect_free(aspect_terms=terms) for terms in df[label_col])
+    return texts, np.array(aspect_free)
+
+
+def split_tuning(labels, fraction, seed):
+    """Indices of the fitting and held-out tuning rows, stratified on the label."""
+    rng = np.random.default_rng(seed)
+    fit_idx, tune_idx = [], []
+    for value in (False, True):
+        idx = rng.permutation(np.flatnonzero(labels == value))
+        n_tune = int(round(len(idx) * fraction))
+        tune_idx.extend(idx[:n_tune])
+        fit_idx.extend(idx[n_tune:])
+    return np.sort(fit_idx), np.sort(tune_idx)
+
+
+def report(scores, aspect_free, threshold):
+    skipped = scores >= threshold
+    return {
+        'threshold': threshold,
+        'skip_rate': skipped.mean(),
+        'recall_lost': (skipped & ~aspect_free).sum() / max(1, (~aspect_free).sum()),
+        'aspect_free_caught': (skipped & aspect_free).sum() / max(1, aspect_free.sum()),
+    }
+
+
+def main():
+    args = setup_parser().parse_args()
+    train_texts, train_labels = load_rows(args.train_paths.split(','), args.text_col)
+    eval_texts, eval_labels = load_rows([args.eval_path], args.text_col)
+    print(f'Train: {len(train_texts)} reviews ({train_labels.mean():.1%} aspect-free)')
+    print(f'Eval:  {len(eval_texts)} reviews ({eval_labels.mean():.1%} aspect-free)')
+
+    fit_idx, tune_idx = split_tuning(train_labels, args.tune_fraction, args.seed)
+    print(f'Fit on {len(fit_idx)} train reviews, threshold tuned on {len(tune_idx)} held out')
+    prefilter = NoAspectPrefilter().fit([train_texts[i] for i in fit_idx], train_labels[fit_idx].tolist())
+    tune_scores = prefilter.scores([train_texts[i] for i in tune_idx])
+
+    threshold = None
+    for candidate in np.arange(0.50, 1.0, 0.01):
+        candidate = round(float(candidate), 2)
+        if report(tune_scores, train_labels[tune_idx], candidate)['recall_lost'] <= args.max_recall_loss:
+            threshold = candidate
+            break
+    if threshold is None:
+        print('No threshold keeps the lost recall on the held-out rows within', args.max_recall_loss)
+        sys.exit(1)
+
+    prefilter.threshold = threshold
+    best = report(prefilter.scores(eval_texts), eval_labels, threshold)
+    print(f"Threshold: {best['threshold']:.2f}")
+    print('On the eval set:')
+    print(f"Skip rate: {best['skip_rate']:.2%}")
+    print(f"Recall lost: {best['recall_lost']:.2%}")
+    print(f"Aspect-free reviews skipped: {best['aspect_free_caught']:.2%}")
+    prefilter.save(args.output)
+    print('Pre-filter saved at: ', args.output)
+
+
+if __name__ == '__main__':
+    main()
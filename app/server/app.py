@@ -1,63 +1,140 @@
-from flask import Flask, jsonify
-from flask_socketio import SocketIO, emit
-import requests
+from aiohttp import ClientSession, ClientTimeout, web
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import asyncio
+import socketio
 import uuid
-import json
 import os
 from dotenv import load_dotenv
 
 from service import db_connection
-from utils import utils
+from service.review_writer import ReviewWriter
+from utils import raw_json, utils
 
 
 load_dotenv()
 
-app = Flask(__name__)
-socket_server = SocketIO(app, cors_allowed_origins="*")
+# Every client is served by one event loop: while a crawl is in flight the
+# handler is suspended on the HTTP call instead of holding a worker thread.
+# Database calls are short and run on the pooled psycopg2 layer in threads.
+socket_server = socketio.AsyncServer(async_mode="aiohttp", cors_allowed_origins="*", json=raw_json)
+app = web.Application()
+socket_server.attach(app)
+
+# One review writer per connected client, flushed when the client disconnects
+writers = {}
+
+
+def get_writer(sid):
+    if sid not in writers:
+        writers[sid] = ReviewWriter()
+    return writers[sid]
+
+
+async def metrics(request):
+    return web.Response(body=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+app.router.add_get("/metrics", metrics)
+
+
+async def open_http_session(app):
+    # Crawls page through reviews with Selenium and can take minutes: no timeout
+    app["http"] = ClientSession(timeout=ClientTimeout(total=None))
+
+
+async def close_http_session(app):
+    await app["http"].close()
+    await asyncio.to_thread(db_connection.close_pool)
+
+app.on_startup.append(open_http_session)
+app.on_cleanup.append(close_http_session)
+
+
+async def post_json(url, body):
+    async with app["http"].post(url, json=body) as res:
+        return await res.json()
+
+
+@socket_server.on("disconnect")
+async def handle_disconnect(sid, *args):
+    writer = writers.pop(sid, None)
+    if writer is not None:
+        await asyncio.to_thread(writer.close)
 
 
 @socket_server.on("ask_reviews")
-def handle_message(data):
+async def handle_message(sid, data):
+    writer = get_writer(sid)
+    # Cursor clients wait for page_end, even when the page fails half-way
+    page_end = None
     try:
-        url, range = data["url"], data["range"]
-        
-        # Read reviews from database
-        reviews_in_db = db_connection.get_reviews(url, range)
-        reviews_in_db = [{
-            "id": review[0],
-            "user": review[1],
-            "date": utils.serialize_date(review[2]),
-            "results": json.loads(review[3]),
-            "url": review[4],
-            "content": review[5],
-        } for review in reviews_in_db]
-        
-        # Send reviews to client
-        for review in reviews_in_db:
-            emit("review", review)
+        url = data["url"]
+
+        # Read reviews from database: keyset pages when the client sends a
+        # cursor/limit, numeric offsets for clients still sending a range
+        if "range" in data:
+            range = data["range"]
+            reviews_in_db = await asyncio.to_thread(db_connection.get_reviews, url, range)
+        else:
+            page_end = {"cursor": data.get("cursor"), "count": 0}
+            cursor = utils.decode_cursor(data.get("cursor"))
+            offset = cursor["offset"] if cursor else 0
+            range = [offset, offset + int(data["limit"])]
+            reviews_in_db = await asyncio.to_thread(db_connection.get_reviews_after, url, cursor, range[1] - range[0])
+
+        # Send reviews to client: Postgres already assembled each one as JSON
+        for _, _, review_json in reviews_in_db:
+            await socket_server.emit("review", raw_json.RawJSON(review_json), to=sid)
+        if page_end is not None and reviews_in_db:
+            # database rows come in page order: the next page starts after the last one sent
+            last_id, last_date, _ = reviews_in_db[-1]
+            page_end = {"cursor": utils.encode_cursor({"id": last_id, "date": last_date}, range[0] + len(reviews_in_db)), "count": len(reviews_in_db)}
+        crawled_ids = []
 
         # If not enough, request crawler to crawl
         if len(reviews_in_db) < range[1] - range[0]:
             range_to_crawl = [range[0] + len(reviews_in_db), range[1]]
-            crawler_res = requests.post(f"{os.getenv('CRAWLER_URL')}/fetch_reviews", json={"url": url, "range": range_to_crawl})
-            reviews_from_crawler = crawler_res.json()["reviews"]
+            crawler_res = await post_json(f"{os.getenv('CRAWLER_URL')}/fetch_reviews", {"url": url, "range": range_to_crawl})
+            reviews_from_crawler = crawler_res["reviews"]
             print(f"Got {len(reviews_from_crawler)} reviews from crawler")
-            for review in reviews_from_crawler:
-                res = requests.post(f"{os.getenv('MODEL_URL')}/predict", json={"review": review["review"]})
-                new_review = {
-                    "id": str(uuid.uuid4()),
-                    "url": url,
-                    "user": review["author_name"],
-                    "date": review["review_date"],
-                    "content": review["review"],
-                    "results": res.json()["results"],
-                }
-                emit("review", new_review)
-                db_connection.save_review(new_review)
+            if reviews_from_crawler:
+                # Score the whole crawl page with a single model call
+                predictions = await post_json(f"{os.getenv('MODEL_URL')}/predict_batch", {"reviews": [review["review"] or "" for review in reviews_from_crawler]})
+                if not isinstance(predictions, list) or len(predictions) != len(reviews_from_crawler):
+                    raise ValueError(f"Model returned {len(predictions) if isinstance(predictions, list) else 'no'} predictions for {len(reviews_from_crawler)} reviews")
+                for review, prediction in zip(reviews_from_crawler, predictions):
+                    new_review = {
+                        "id": str(uuid.uuid4()),
+                        "url": url,
+                        "user": review["author_name"],
+                        "date": utils.parse_review_date(review["review_date"]),
+                        "content": review["review"],
+                        "results": prediction["results"],
+                    }
+                    await socket_server.emit("review", {**new_review, "date": utils.serialize_date(new_review["date"])}, to=sid)
+                    await asyncio.to_thread(writer.add, new_review)
+                    crawled_ids.append(new_review["id"])
+
+        # Cursor clients get the position of their next page, once the
+        # crawled reviews are saved and visible to the next read
+        if "range" not in data:
+            await asyncio.to_thread(writer.flush)
+            # The page ends at the greatest (date, id) among the database rows
+            # and the saved crawled ones; Postgres compares them in page order
+            page_ids = crawled_ids + ([reviews_in_db[-1][0]] if reviews_in_db else [])
+            last = await asyncio.to_thread(db_connection.get_last_review, page_ids)
+            count = len(reviews_in_db) + len(crawled_ids)
+            next_cursor = utils.encode_cursor(last, range[0] + count) if last else data.get("cursor")
+            page_end = None
+            await socket_server.emit("page_end", {"cursor": next_cursor, "count": count}, to=sid)
     except Exception as e:
         print("Error", e)
-        return jsonify({"error": "Bad request"}), 400
+        if page_end is not None:
+            # end the page at the database rows already sent so the client can retry from there
+            await socket_server.emit("page_end", {**page_end, "error": "Bad request"}, to=sid)
+        return {"error": "Bad request"}
+    finally:
+        await asyncio.to_thread(writer.flush)
 
 
 if __name__ == "__main__":
-    socket_server.run(app, host="0.0.0.0", port=5000)
+    web.run_app(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,6 @@
+"""
+Local benchmarks for the server against a throwaway Postgres.
+
+Usage (from app/server):
+    python -m benchmark.db_pool -events 200
+"""
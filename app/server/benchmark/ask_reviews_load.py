@@ -0,0 +1,85 @@
+"""
+How many concurrent `ask_reviews` sessions one server process sustains.
+
+Every session connects, asks for a page of a movie nobody asked for before
+(so the server has to crawl it) and waits for all reviews of the page. Each
+concurrency level reports how many sessions completed within `-timeout` and
+their latency. Uses the `range` protocol, so the same run works against older
+servers for a before/after comparison.
+
+Usage (from app/server, with benchmark.stub_backends and the server running):
+    python -m benchmark.ask_reviews_load -server http://localhost:5000 -concurrency 1,10,50,100
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from argparse import ArgumentParser
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, os.pardir)))
+
+import socketio
+
+from benchmark.db_pool import percentile
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Load test concurrent ask_reviews sessions')
+    parser.add_argument('-server', default='http://localhost:5000', type=str)
+    parser.add_argument('-concurrency', help='Comma separated numbers of concurrent sessions', default='1,10,50,100', type=str)
+    parser.add_argument('-page_size', help='Reviews asked per session', default=25, type=int)
+    parser.add_argument('-timeout', help='Seconds a session may take', default=120, type=float)
+    parser.add_argument('-output', help='Write results as JSON to this path', type=str)
+    return parser
+
+
+async def session(args):
+    client = socketio.AsyncClient()
+    received = 0
+    done = asyncio.Event()
+
+    @client.on('review')
+    async def on_review(data):
+        nonlocal received
+        received += 1
+        if received >= args.page_size:
+            done.set()
+
+    start = time.perf_counter()
+    try:
+        await client.connect(args.server, transports=['websocket'])
+        await client.emit('ask_reviews', {'url': f'https://www.imdb.com/title/{uuid.uuid4()}/reviews', 'range': [0, args.page_size]})
+        await asyncio.wait_for(done.wait(), args.timeout - (time.perf_counter() - start))
+        return time.perf_counter() - start
+    except (asyncio.TimeoutError, socketio.exceptions.ConnectionError):
+        return None
+    finally:
+        await client.disconnect()
+
+
+async def run(args):
+    report = []
+    for concurrency in map(int, args.concurrency.split(',')):
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(session(args) for _ in range(concurrency)))
+        completed = [latency for latency in latencies if latency is not None]
+        report.append({
+            'concurrency': concurrency,
+            'completed': len(completed),
+            'wall_seconds': time.perf_counter() - start,
+            'p50_seconds': percentile(completed, 50) if completed else None,
+            'p95_seconds': percentile(completed, 95) if completed else None,
+        })
+        row = report[-1]
+        print(f"{concurrency:>6} sessions: {row['completed']:>6} completed in {row['wall_seconds']:.1f}s"
+              + (f", p50 {row['p50_seconds']:.1f}s, p95 {row['p95_seconds']:.1f}s" if completed else ''))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    asyncio.run(run(setup_parser().parse_args()))
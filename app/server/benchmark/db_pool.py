@@ -0,0 +1,114 @@
+"""
+Per-event database latency with a new connection per call, with the pool, and
+with the pool plus the bulk review writer.
+
+One event mimics an `ask_reviews` socket event: read a page of stored reviews,
+then save the crawled reviews, one by one or as one multi-row upsert.
+
+Usage (from app/server):
+    python -m benchmark.db_pool -events 200 -saves_per_event 10
+"""
+import json
+import math
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, os.pardir)))
+
+from benchmark.postgres import connect, fake_review, seed, throwaway_postgres
+
+URL = 'https://www.imdb.com/title/tt0000000/reviews'
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Benchmark pooled vs. per-call database connections')
+    parser.add_argument('-env_db', help='Use the POSTGRES_* database, whose name must end in _bench, instead of a throwaway container', action='store_true')
+    parser.add_argument('-port', help='Host port of the throwaway container', default=55432, type=int)
+    parser.add_argument('-rows', help='Reviews stored before the run', default=1000, type=int)
+    parser.add_argument('-events', help='Socket events to replay per mode', default=200, type=int)
+    parser.add_argument('-page_size', help='Reviews read per event', default=10, type=int)
+    parser.add_argument('-saves_per_event', help='Reviews saved per event', default=10, type=int)
+    parser.add_argument('-output', help='Write results as JSON to this path', type=str)
+    return parser
+
+
+def per_call_event(page, reviews):
+    # What db_connection did before pooling: connect, run one statement, close
+    conn = connect()
+    with conn.cursor() as cursor:
+        cursor.execute('select * from reviews where url = %s order by date limit %s OFFSET %s',
+                       (URL, page[1] - page[0], page[0]))
+        cursor.fetchall()
+    conn.close()
+    for review in reviews:
+        conn = connect()
+        with conn.cursor() as cursor:
+            cursor.execute('insert into reviews (id, url, "user", date, content, results) values (%s, %s, %s, %s, %s, %s) '
+                           'on conflict (id) do nothing',
+                           (review['id'], review['url'], review['user'], review['date'], review['content'],
+                            json.dumps(review['results'])))
+        conn.commit()
+        conn.close()
+
+
+def pooled_event(page, reviews):
+    from service import db_connection
+
+    db_connection.get_reviews(URL, page)
+    for review in reviews:
+        db_connection.save_review(review)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def bulk_event(page, reviews):
+    from service import db_connection
+    from service.review_writer import ReviewWriter
+
+    db_connection.get_reviews(URL, page)
+    with ReviewWriter() as writer:
+        for review in reviews:
+            writer.add(review)
+
+
+def run(event, args):
+    latencies = []
+    for i in range(args.events):
+        start = i * args.page_size % args.rows
+        reviews = [fake_review(URL, i * args.saves_per_event + j) for j in range(args.saves_per_event)]
+        t0 = time.perf_counter()
+        event([start, start + args.page_size], reviews)
+        latencies.append(1000 * (time.perf_counter() - t0))
+    return {
+        'events': args.events,
+        'mean_ms': sum(latencies) / len(latencies),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+    }
+
+
+def main():
+    args = setup_parser().parse_args()
+    report = {}
+    with throwaway_postgres(args.env_db, args.port):
+        for mode, event in (('per_call', per_call_event), ('pooled', pooled_event), ('bulk', bulk_event)):
+            seed(URL, args.rows)
+            report[mode] = run(event, args)
+
+    print(f"{'mode':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for mode, row in report.items():
+        print(f"{mode:<10}{row['mean_ms']:>10.2f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Latency of reading one page at increasing depths: OFFSET vs. keyset cursor.
+
+Usage (from app/server):
+    python -m benchmark.pagination -rows 100000 -depths 0,1000,10000,90000
+"""
+import json
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, os.pardir)))
+
+from benchmark.postgres import seed, throwaway_postgres
+
+URL = 'https://www.imdb.com/title/tt0000000/reviews'
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Benchmark offset vs. keyset pagination')
+    parser.add_argument('-env_db', help='Use the POSTGRES_* database, whose name must end in _bench, instead of a throwaway container', action='store_true')
+    parser.add_argument('-port', help='Host port of the throwaway container', default=55432, type=int)
+    parser.add_argument('-rows', help='Reviews stored for the movie', default=100000, type=int)
+    parser.add_argument('-depths', help='Comma separated page start offsets', default='0,1000,10000,90000', type=str)
+    parser.add_argument('-page_size', default=25, type=int)
+    parser.add_argument('-repeats', help='Reads per depth and mode; the median is reported', default=20, type=int)
+    parser.add_argument('-output', help='Write results as JSON to this path', type=str)
+    return parser
+
+
+def median_ms(read, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        read()
+        latencies.append(1000 * (time.perf_counter() - start))
+    return sorted(latencies)[len(latencies) // 2]
+
+
+def main():
+    args = setup_parser().parse_args()
+    report = []
+    with throwaway_postgres(args.env_db, args.port):
+        seed(URL, args.rows)
+        from service import db_connection
+
+        for depth in map(int, args.depths.split(',')):
+            # cursor of the row just before the page, as the previous page would return it
+            previous = db_connection.get_reviews(URL, [depth - 1, depth]) if depth else []
+            cursor = {'date': previous[-1][1], 'id': previous[-1][0]} if previous else None
+            report.append({
+                'depth': depth,
+                'offset_ms': median_ms(lambda: db_connection.get_reviews(URL, [depth, depth + args.page_size]), args.repeats),
+                'keyset_ms': median_ms(lambda: db_connection.get_reviews_after(URL, cursor, args.page_size), args.repeats),
+            })
+
+    print(f"{'depth':>8}{'offset ms':>12}{'keyset ms':>12}")
+    for row in report:
+        print(f"{row['depth']:>8}{row['offset_ms']:>12.2f}{row['keyset_ms']:>12.2f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
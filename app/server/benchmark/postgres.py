@@ -0,0 +1,103 @@
+import os
+import subprocess
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+
+# seed() drops the reviews table: only databases named like this are seeded
+THROWAWAY_SUFFIX = '_bench'
+
+
+def is_throwaway(dbname):
+    return bool(dbname) and (dbname == 'bench' or dbname.endswith(THROWAWAY_SUFFIX))
+
+
+@contextmanager
+def throwaway_postgres(env_db, port, image='postgres:16-alpine'):
+    """
+    Point the POSTGRES_* variables at a disposable database. By default a
+    container is started on `port` and removed afterwards. With `env_db` the
+    database from the environment / .env is used instead; its name must end
+    in `_bench` so a benchmark never drops the reviews of a real database.
+    """
+    if env_db:
+        dbname = os.getenv('POSTGRES_DATABASE')
+        if not is_throwaway(dbname):
+            raise Exception(f'Refusing to benchmark against database "{dbname}": its name must end in "{THROWAWAY_SUFFIX}".')
+        yield
+        return
+    container = subprocess.check_output([
+        'docker', 'run', '--rm', '-d', '-p', f'{port}:5432',
+        '-e', 'POSTGRES_USER=bench', '-e', 'POSTGRES_PASSWORD=bench', '-e', 'POSTGRES_DB=bench', image,
+    ]).decode().strip()
+    os.environ.update({
+        'POSTGRES_USER': 'bench', 'POSTGRES_PASSWORD': 'bench', 'POSTGRES_DATABASE': 'bench',
+        'POSTGRES_HOST': 'localhost', 'DB_PORT': str(port),
+    })
+    try:
+        wait_ready()
+        yield
+    finally:
+        subprocess.run(['docker', 'stop', container], stdout=subprocess.DEVNULL)
+
+
+def connect():
+    return psycopg2.connect(
+        dbname=os.getenv('POSTGRES_DATABASE'),
+        user=os.getenv('POSTGRES_USER'),
+        password=os.getenv('POSTGRES_PASSWORD'),
+        host=os.getenv('POSTGRES_HOST'),
+        port=os.getenv('DB_PORT', '5432'),
+    )
+
+
+def wait_ready(timeout=60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connect().close()
+            return
+        except psycopg2.OperationalError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def seed(url, rows):
+    """(Re)create the reviews table through the migrations and fill it with `rows` reviews of `url`."""
+    from migrate import apply_migrations
+
+    dbname = os.getenv('POSTGRES_DATABASE')
+    if not is_throwaway(dbname):
+        raise Exception(f'Refusing to drop the reviews of database "{dbname}": its name must end in "{THROWAWAY_SUFFIX}".')
+    conn = connect()
+    with conn.cursor() as cursor:
+        cursor.execute('drop table if exists reviews, schema_migrations')
+    conn.commit()
+    apply_migrations(conn)
+    with conn.cursor() as cursor:
+        start = datetime(2020, 1, 1)
+        execute_values(
+            cursor,
+            'insert into reviews (id, url, "user", date, content, results) values %s',
+            [(str(uuid.uuid4()), url, f'user{i}', start + timedelta(hours=i), f'Review {i}: the plot was gripping.', '[]')
+             for i in range(rows)],
+        )
+        cursor.execute('analyze reviews')
+    conn.close()
+
+
+def fake_review(url, i):
+    return {
+        'id': str(uuid.uuid4()),
+        'url': url,
+        'user': f'crawler{i}',
+        'date': datetime(2024, 1, 1) + timedelta(minutes=i),
+        'content': f'Crawled review {i}: the acting was wooden.',
+        'results': [{'aspects': ['acting'], 'opinions': ['wooden'], 'polarities': ['negative']}],
+    }
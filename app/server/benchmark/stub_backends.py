@@ -0,0 +1,71 @@
+"""
+Stand-ins for the crawler and the model service, for load tests of the server.
+
+The crawler answers /fetch_reviews after `-crawl_seconds` (a crawl is mostly
+waiting on Selenium) with exactly the requested number of reviews; the model
+answers /predict_batch immediately.
+
+Usage (from app/server):
+    python -m benchmark.stub_backends -crawl_seconds 5
+    CRAWLER_URL=http://localhost:7100 MODEL_URL=http://localhost:8100 python app.py
+"""
+import asyncio
+from argparse import ArgumentParser
+
+from aiohttp import web
+
+
+def setup_parser():
+    parser = ArgumentParser(description='Stub crawler and model services')
+    parser.add_argument('-crawl_seconds', help='Time a crawl takes', default=5.0, type=float)
+    parser.add_argument('-crawler_port', default=7100, type=int)
+    parser.add_argument('-model_port', default=8100, type=int)
+    return parser
+
+
+def crawler_app(crawl_seconds):
+    async def fetch_reviews(request):
+        body = await request.json()
+        start, end = body['range']
+        await asyncio.sleep(crawl_seconds)
+        return web.json_response({'reviews': [{
+            'author_name': f'user{i}',
+            'review_date': '2024-01-01',
+            'review': f'Review {i}: the plot was gripping but the acting was wooden.',
+        } for i in range(start, end)]})
+
+    app = web.Application()
+    app.router.add_post('/fetch_reviews', fetch_reviews)
+    return app
+
+
+def model_app():
+    async def predict_batch(request):
+        body = await request.json()
+        return web.json_response([{
+            'raw_output': 'plot:gripping:positive, acting:wooden:negative',
+            'results': [],
+        } for _ in body['reviews']])
+
+    app = web.Application()
+    app.router.add_post('/predict_batch', predict_batch)
+    return app
+
+
+async def serve(args):
+    runners = []
+    for app, port in ((crawler_app(args.crawl_seconds), args.crawler_port), (model_app(), args.model_port)):
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '0.0.0.0', port).start()
+        runners.append(runner)
+    print(f'Crawler on :{args.crawler_port}, model on :{args.model_port}')
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(serve(setup_parser().parse_args()))
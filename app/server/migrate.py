@@ -0,0 +1,38 @@
+"""
+Apply the SQL files in migrations/ that have not been applied yet, in name order.
+
+Each file runs in autocommit mode so it can use `create index concurrently`;
+such a file must hold a single statement. Applied files are recorded in the
+schema_migrations table.
+
+Usage (from app/server):
+    python migrate.py
+"""
+import os
+
+from service import db_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+
+def apply_migrations(conn):
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("create table if not exists schema_migrations (name text primary key, applied_at timestamptz not null default now())")
+        cursor.execute("select name from schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+        for name in sorted(os.listdir(MIGRATIONS_DIR)):
+            if not name.endswith(".sql") or name in applied:
+                continue
+            with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+                cursor.execute(f.read())
+            cursor.execute("insert into schema_migrations (name) values (%s)", (name,))
+            print("Applied migration: ", name)
+
+
+if __name__ == "__main__":
+    conn = db_connection.get_db_connection()
+    try:
+        apply_migrations(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,10 @@
+-- Base reviews table, as originally created outside the migrations; a no-op
+-- on existing databases. Later migrations bring it to the current schema.
+create table if not exists reviews (
+    id text primary key,
+    "user" text,
+    date timestamp,
+    results text,
+    url text,
+    content text
+)
@@ -0,0 +1,3 @@
+-- Serves "reviews of one movie ordered by date" for both offset and keyset
+-- pagination; id breaks ties between reviews posted on the same date.
+create index concurrently if not exists reviews_url_date_id_idx on reviews (url, date, id)
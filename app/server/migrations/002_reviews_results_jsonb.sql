@@ -0,0 +1,3 @@
+-- Store prediction results as JSONB so reviews can be assembled as JSON by
+-- Postgres and forwarded to clients without decoding them in Python.
+alter table reviews alter column results type jsonb using results::jsonb
@@ -0,0 +1,3 @@
+-- Reviews without a date sort after every dated review: pagination orders by
+-- coalesce(date, 'infinity') so row comparisons on (date, id) never see NULL.
+create index concurrently if not exists reviews_url_date_nulls_last_id_idx on reviews (url, coalesce(date, 'infinity'::timestamp), id)
@@ -0,0 +1,2 @@
+-- Replaced by reviews_url_date_nulls_last_id_idx
+drop index concurrently if exists reviews_url_date_id_idx
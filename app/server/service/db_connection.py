@@ -1,11 +1,88 @@
 import psycopg2
+import psycopg2.extensions
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 import json
 
+from service import metrics
+
 
 load_dotenv()
 
+# Bounded pool shared by every socket handler; a checkout waits up to
+# POSTGRES_POOL_TIMEOUT seconds when all connections are in use
+POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10"))
+POOL_TIMEOUT = float(os.getenv("POSTGRES_POOL_TIMEOUT", "30"))
+# Connections idle for longer than this many seconds are pinged before reuse
+POOL_HEALTH_CHECK_AFTER = float(os.getenv("POSTGRES_POOL_HEALTH_CHECK_AFTER", "30"))
+
+# A review as the client receives it, assembled by Postgres. The cast keeps
+# results a JSON array, not a string, on databases still missing migration 002.
+REVIEW_JSON = """
+    json_build_object(
+        'id', id, 'user', "user", 'date', date, 'results', results::jsonb, 'url', url, 'content', content
+    )::text
+"""
+
+# Page order of reviews: by date, reviews without one last. Must match the
+# expression of the reviews_url_date_nulls_last_id_idx index.
+REVIEW_DATE = "coalesce(date, 'infinity'::timestamp)"
+
+# Server-side prepared statements, prepared once per pooled connection.
+# Parameter types are inferred by Postgres from the table columns.
+# Review reads return (id, date, review JSON text) rows.
+STATEMENTS = {
+    "get_reviews": f"""
+        select id, date, {REVIEW_JSON} from reviews
+        where url = $1
+        order by {REVIEW_DATE}, id
+        limit $2 OFFSET $3
+    """,
+    # keyset pagination on the (url, date, id) index: no skipped rows are read
+    "get_reviews_first": f"""
+        select id, date, {REVIEW_JSON} from reviews
+        where url = $1
+        order by {REVIEW_DATE}, id
+        limit $2
+    """,
+    "get_reviews_after": f"""
+        select id, date, {REVIEW_JSON} from reviews
+        where url = $1 and ({REVIEW_DATE}, id) > ($2, $3)
+        order by {REVIEW_DATE}, id
+        limit $4
+    """,
+    "get_last_review": f"""
+        select date, id from reviews
+        where id = any($1)
+        order by {REVIEW_DATE} desc, id desc
+        limit 1
+    """,
+    "save_review": """
+        insert into reviews (id, url, "user", date, content, results)
+        values ($1, $2, $3, $4, $5, $6)
+        on conflict (id) do nothing
+    """,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(POOL_MAX_SIZE)
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Connection that remembers its prepared statements and when it was last returned."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.last_used = time.monotonic()
+
 
 def get_db_connection():
     return psycopg2.connect(
@@ -17,38 +94,212 @@ def get_db_connection():
     )
 
 
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(
+                POOL_MIN_SIZE,
+                POOL_MAX_SIZE,
+                connection_factory=PooledConnection,
+                dbname=os.getenv("POSTGRES_DATABASE"),
+                user=os.getenv("POSTGRES_USER"),
+                password=os.getenv("POSTGRES_PASSWORD"),
+                host=os.getenv("POSTGRES_HOST"),
+                port=os.getenv("DB_PORT", "5432"),
+            )
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+def _is_healthy(conn):
+    if conn.closed:
+        return False
+    if time.monotonic() - conn.last_used < POOL_HEALTH_CHECK_AFTER:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("select 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout(pool):
+    # every connection in the pool may have gone stale, plus one fresh connection
+    for _ in range(POOL_MAX_SIZE + 1):
+        conn = pool.getconn()
+        if _is_healthy(conn):
+            return conn
+        metrics.DB_POOL_HEALTH_CHECK_FAILURES.inc()
+        pool.putconn(conn, close=True)
+    raise PoolError("Could not get a healthy database connection")
+
+
+@contextmanager
+def connection():
+    """
+    Check a healthy connection out of the pool for one transaction: committed
+    when the block succeeds, rolled back when it raises. Broken connections
+    are closed instead of being returned to the pool.
+    """
+    pool = get_pool()
+    start = time.perf_counter()
+    if not _slots.acquire(timeout=POOL_TIMEOUT):
+        metrics.DB_POOL_CHECKOUTS.labels("timeout").inc()
+        raise PoolError(f"No database connection available after {POOL_TIMEOUT}s")
+    metrics.DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+    try:
+        conn = _checkout(pool)
+    except Exception:
+        _slots.release()
+        metrics.DB_POOL_CHECKOUTS.labels("error").inc()
+        raise
+    metrics.DB_POOL_CHECKOUTS.labels("ok").inc()
+    metrics.DB_POOL_IN_USE.inc()
+    broken = False
+    try:
+        with conn:
+            yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        conn.last_used = time.monotonic()
+        pool.putconn(conn, close=broken or bool(conn.closed))
+        metrics.DB_POOL_IN_USE.dec()
+        _slots.release()
+
+
+def execute(cursor, name, params):
+    """Run a statement of STATEMENTS, preparing it on first use on this connection."""
+    conn = cursor.connection
+    with metrics.DB_QUERY_SECONDS.labels(name).time():
+        if name not in conn.prepared:
+            cursor.execute(f"prepare {name} as {STATEMENTS[name]}")
+            conn.prepared.add(name)
+        cursor.execute(f"execute {name} ({', '.join(['%s'] * len(params))})", params)
+
+
 def get_reviews(url, range):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        query = f"""
-            select * from reviews
-            where url = %s
-            order by date
-            limit %s OFFSET %s
-        """
-        cursor.execute(query, (url, range[1] - range[0], range[0]))
-        records = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return records
+        with connection() as conn, conn.cursor() as cursor:
+            execute(cursor, "get_reviews", (url, range[1] - range[0], range[0]))
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error: {e}")
         return []
 
 
+def get_reviews_after(url, cursor, limit):
+    """
+    Reviews of `url` after a decoded keyset cursor ({"date", "id"}), or the
+    first page. A cursor without a date points into the undated reviews.
+    """
+    try:
+        with connection() as conn, conn.cursor() as cursor_:
+            if cursor is None:
+                execute(cursor_, "get_reviews_first", (url, limit))
+            else:
+                date = cursor["date"] if cursor["date"] is not None else "infinity"
+                execute(cursor_, "get_reviews_after", (url, date, cursor["id"], limit))
+            return cursor_.fetchall()
+    except Exception as e:
+        print(f"Error: {e}")
+        return []
+
+
+def get_last_review(ids):
+    """Date and id of the last of the given reviews in page order, as a cursor position."""
+    if not ids:
+        return None
+    try:
+        with connection() as conn, conn.cursor() as cursor:
+            execute(cursor, "get_last_review", (list(ids),))
+            row = cursor.fetchone()
+            return {"date": row[0], "id": row[1]} if row else None
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
 def save_review(review):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        query = f"""
-            insert into reviews (id, url, "user", date, content, results)
-            values (%s, %s, %s, %s, %s, %s)
-            on conflict (id) do nothing
-        """
-        cursor.execute(query, (review["id"], review["url"], review["user"], review["date"], review["content"], json.dumps(review["results"])))
-        conn.commit()
-        conn.close()
+        with connection() as conn, conn.cursor() as cursor:
+            execute(cursor, "save_review", (review["id"], review["url"], review["user"], review["date"], review["content"], json.dumps(review["results"])))
     except Exception as e:
         print(f"Error: {e}")
-        return []
\ No newline at end of file
+        return []
+
+
+class ReviewWriteError(Exception):
+    """Some reviews of a batch could not be saved; `failed` maps their ids to the error."""
+
+    def __init__(self, failed, total):
+        super().__init__(f"{len(failed)} of {total} reviews could not be saved: " + "; ".join(f"{id}: {e}" for id, e in failed.items()))
+        self.failed = failed
+
+
+def _review_row(review):
+    return (review["id"], review["url"], review["user"], review["date"], review["content"], json.dumps(review["results"]))
+
+
+def save_reviews(reviews):
+    """
+    Save a batch of reviews with one multi-row upsert and a single commit.
+
+    When the batch is rejected (e.g. one row holds a value its column does not
+    accept) the rows are saved one by one, each under a savepoint, so only the
+    bad rows are lost. Those are counted in DB_WRITE_FAILURES and reported by
+    raising ReviewWriteError once the others are committed.
+    """
+    if not reviews:
+        return
+    try:
+        with connection() as conn, conn.cursor() as cursor:
+            with metrics.DB_QUERY_SECONDS.labels("save_reviews").time():
+                execute_values(
+                    cursor,
+                    """
+                        insert into reviews (id, url, "user", date, content, results)
+                        values %s
+                        on conflict (id) do nothing
+                    """,
+                    [_review_row(review) for review in reviews],
+                    page_size=len(reviews),
+                )
+        metrics.DB_WRITE_BATCH_SIZE.observe(len(reviews))
+        return
+    except (psycopg2.OperationalError, psycopg2.InterfaceError, PoolError):
+        metrics.DB_WRITE_FAILURES.inc(len(reviews))
+        raise
+    except Exception as e:
+        print(f"Error: batch of {len(reviews)} reviews rejected, saving them one by one: {e}")
+
+    failed = {}
+    try:
+        with connection() as conn, conn.cursor() as cursor:
+            for review in reviews:
+                cursor.execute("savepoint save_review")
+                try:
+                    execute(cursor, "save_review", _review_row(review))
+                except Exception as e:
+                    cursor.execute("rollback to savepoint save_review")
+                    failed[review["id"]] = e
+                else:
+                    cursor.execute("release savepoint save_review")
+    except Exception:
+        metrics.DB_WRITE_FAILURES.inc(len(reviews))
+        raise
+    metrics.DB_WRITE_BATCH_SIZE.observe(len(reviews) - len(failed))
+    if failed:
+        metrics.DB_WRITE_FAILURES.inc(len(failed))
+        raise ReviewWriteError(failed, len(reviews))
@@ -0,0 +1,25 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+DB_POOL_WAIT_SECONDS = Histogram(
+    "server_db_pool_wait_seconds",
+    "Time spent waiting for a free pooled database connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CHECKOUTS = Counter("server_db_pool_checkouts", "Pooled connection checkouts by outcome", ["outcome"])
+DB_POOL_IN_USE = Gauge("server_db_pool_in_use", "Pooled connections currently checked out")
+DB_POOL_HEALTH_CHECK_FAILURES = Counter(
+    "server_db_pool_health_check_failures",
+    "Pooled connections discarded because they failed their health check",
+)
+DB_QUERY_SECONDS = Histogram(
+    "server_db_query_seconds",
+    "Time spent running a database statement, connection checkout excluded",
+    ["statement"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+DB_WRITE_BATCH_SIZE = Histogram(
+    "server_db_write_batch_size",
+    "Reviews saved per multi-row upsert",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+DB_WRITE_FAILURES = Counter("server_db_write_failures", "Reviews that could not be saved")
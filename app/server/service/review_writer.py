@@ -0,0 +1,75 @@
+import os
+import threading
+
+from service import db_connection
+
+# A buffered batch is saved once it holds this many reviews, or this many
+# seconds after its first review was buffered, whichever comes first
+BATCH_SIZE = int(os.getenv("REVIEW_WRITER_BATCH_SIZE", "100"))
+FLUSH_SECONDS = float(os.getenv("REVIEW_WRITER_FLUSH_SECONDS", "2"))
+
+
+class ReviewWriter:
+    """
+    Buffer scored reviews and save them with one multi-row upsert per batch.
+
+    Batches are flushed on size, on time and on flush()/close(); close() is
+    called when the client disconnects so nothing buffered is lost. Save
+    errors are logged and counted in `failures`: a flush also runs on the
+    timer thread, where raising would go unnoticed.
+    """
+
+    def __init__(self, save=None, batch_size=BATCH_SIZE, flush_seconds=FLUSH_SECONDS):
+        self.save = save or db_connection.save_reviews
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._buffer = []
+        self._timer = None
+        self._lock = threading.Lock()
+        self.failures = 0
+
+    def add(self, review):
+        with self._lock:
+            self._buffer.append(review)
+            if len(self._buffer) >= self.batch_size:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.flush_seconds, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            self._save(batch)
+
+    def flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._save(batch)
+
+    def _save(self, batch):
+        try:
+            self.save(batch)
+        except db_connection.ReviewWriteError as e:
+            self.failures += len(e.failed)
+            print(f"Error: {e}")
+        except Exception as e:
+            self.failures += len(batch)
+            print(f"Error: could not save {len(batch)} reviews: {e}")
+
+    def close(self):
+        self.flush()
+
+    def _take(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._buffer = self._buffer, []
+        return batch
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,20 @@
+"""
+JSON module for Socket.IO that embeds pre-serialized JSON as is.
+
+Event arguments wrapped in RawJSON (e.g. rows Postgres already assembled with
+json_build_object) are spliced into the packet instead of being decoded and
+re-encoded; everything else goes through the standard json module.
+"""
+import json
+
+loads = json.loads
+
+
+class RawJSON(str):
+    """A string holding JSON text to send as the JSON value it encodes."""
+
+
+def dumps(obj, **kwargs):
+    if isinstance(obj, list) and any(isinstance(item, RawJSON) for item in obj):
+        return "[" + ",".join(item if isinstance(item, RawJSON) else json.dumps(item, **kwargs) for item in obj) + "]"
+    return json.dumps(obj, **kwargs)
@@ -1,7 +1,75 @@
-from datetime import date, datetime
+import base64
+import json
+import re
+from datetime import date, datetime, timedelta
+
+# Absolute review date formats used by the crawled sites ("Jan 5, 2024", ...)
+DATE_FORMATS = ("%b %d, %Y", "%B %d, %Y", "%Y-%m-%d", "%m/%d/%Y", "%d %B %Y", "%d %b %Y")
+# Month and day only ("Jan 5"), for recent reviews
+DATE_FORMATS_NO_YEAR = ("%b %d", "%B %d")
+# Relative dates: "2d", "5h", "3 days ago", "a week ago"
+RELATIVE_DATE = re.compile(r"^(\d+|an?)\s*([a-z]+?)s?(?:\s+ago)?$")
+RELATIVE_UNITS = {
+    "m": timedelta(minutes=1), "min": timedelta(minutes=1), "minute": timedelta(minutes=1),
+    "h": timedelta(hours=1), "hr": timedelta(hours=1), "hour": timedelta(hours=1),
+    "d": timedelta(days=1), "day": timedelta(days=1),
+    "w": timedelta(weeks=1), "week": timedelta(weeks=1),
+    "mo": timedelta(days=30), "month": timedelta(days=30),
+    "y": timedelta(days=365), "yr": timedelta(days=365), "year": timedelta(days=365),
+}
 
 def serialize_date(obj):
     """Convert date or datetime objects to ISO 8601 strings."""
     if isinstance(obj, (date, datetime)):
         return obj.isoformat()
-    return obj
\ No newline at end of file
+    return obj
+
+
+def parse_review_date(value, now=None):
+    """
+    Normalize a crawled review date to a datetime, or None when it is missing
+    or in a format we do not know, so it can be stored in a timestamp column.
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = str(value).strip()
+    if not text or text.upper() == "N/A":
+        return None
+    now = now or datetime.now()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    for fmt in DATE_FORMATS_NO_YEAR:
+        try:
+            parsed = datetime.strptime(f"{text} {now.year}", f"{fmt} %Y")
+        except ValueError:
+            continue
+        # a month and day later than today is from last year
+        return parsed if parsed <= now else parsed.replace(year=now.year - 1)
+    lowered = text.lower()
+    if lowered == "today":
+        return now
+    if lowered == "yesterday":
+        return now - timedelta(days=1)
+    match = RELATIVE_DATE.match(lowered)
+    if match and match.group(2) in RELATIVE_UNITS:
+        count = 1 if match.group(1) in ("a", "an") else int(match.group(1))
+        return now - count * RELATIVE_UNITS[match.group(2)]
+    return None
+
+
+def encode_cursor(review, offset):
+    """Opaque keyset cursor pointing after `review`; `offset` counts the reviews before it."""
+    payload = {"date": serialize_date(review["date"]), "id": review["id"], "offset": offset}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; None for the first page."""
+    if not cursor:
+        return None
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))